@@ -1,15 +1,17 @@
 import streamlit as st
 
-import pandas as pd
+from profiling import span
+from simulation_result import SimulationResult
+from ui.debug_panel import debug_profiler, display_debug_panel, display_result_cache_stats
 from ui.mortgage_calc.form import run_simulation_if_submitted, render_form
 from ui.app_session import init_form_defaults, update_arm_toggle
 from ui.mortgage_calc.tabs import render_tabs
 from ui.mortgage_calc.summary_stats import display_summary_stats
 
 
-def validate_simulation(dfs: dict[str, pd.DataFrame]) -> None:
-    for label, df in dfs.items():
-        if (df['cash_reserve'] < 0).any():
+def validate_simulation(results: dict[str, SimulationResult]) -> None:
+    for label, result in results.items():
+        if (result['cash_reserve'] < 0).any():
             st.error(
                 f"⚠️ In **{label}**, cash reserve went negative. Consider increasing income or reducing the loan.")
 
@@ -33,22 +35,29 @@ st.radio(
 # Run main form and gather inputs
 submitted = render_form()
 
-# Trigger simulation and show results
-dfs = run_simulation_if_submitted(submitted)
-
-# Show tabs with results
-if dfs:
-    all_dates = pd.concat([df['ds'] for df in dfs.values()])
-    min_date = all_dates.min()
-    max_date = all_dates.max()
-
-    selected_range = st.slider(
-        "Select date range to display on plots:",
-        min_value=min_date,
-        max_value=max_date,
-        value=(min_date, max_date),
-        format="MM/YYYY"
-    )
-    validate_simulation(dfs)
-    display_summary_stats(dfs, selected_range)
-    render_tabs(dfs, selected_range)
+profiler = debug_profiler()
+with profiler:
+    # Trigger simulation and show results
+    with span("simulation"):
+        results = run_simulation_if_submitted(submitted)
+
+    # Show tabs with results
+    if results:
+        min_date = min(result.ds[0] for result in results.values())
+        max_date = max(result.ds[-1] for result in results.values())
+
+        selected_range = st.slider(
+            "Select date range to display on plots:",
+            min_value=min_date,
+            max_value=max_date,
+            value=(min_date, max_date),
+            format="MM/YYYY"
+        )
+        with span("validate"):
+            validate_simulation(results)
+        with span("summary_stats"):
+            display_summary_stats(results, selected_range)
+        with span("render_tabs"):
+            render_tabs(results, selected_range)
+display_debug_panel(profiler)
+display_result_cache_stats()
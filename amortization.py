@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from sim_utils import linear_recurrence
+from typing import Tuple
+
+import numpy as np
+import numpy_financial as npf
+import threading
+
+
+@dataclass(frozen=True)
+class UnitSchedule:
+    """
+    Amortization of a loan of 1 at a fixed periodic rate over term_months. A
+    fully amortizing loan of any principal is this schedule times the principal.
+    The arrays are shared by every caller and read-only.
+    """
+    rate: float
+    term_months: int
+    # monthly payment
+    payment: float
+    # balance at the start of every month plus the final one, shape (term_months + 1,)
+    balance: np.ndarray
+    # shape (term_months,)
+    interest: np.ndarray
+    principal: np.ndarray
+    # (1 + rate) ** month, shape (term_months + 1,), grows a balance that is not paid down
+    growth: np.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        return self.balance.nbytes + self.interest.nbytes + self.principal.nbytes + self.growth.nbytes
+
+    def balances(self, start_balance, payment, n_months: int) -> np.ndarray:
+        """
+        Balances after each of the first n_months payments of a loan at this
+        rate. Balances are linear in the start balance and the payment, so a
+        loan that pays payment, which would amortize principal
+        payment / self.payment, is that multiple of the unit schedule plus the
+        difference in start balance grown at the rate.
+        start_balance, payment: scalars or arrays of the same leading shape
+        Returns: shape (..., n_months)
+        """
+        amortized = np.asarray(payment, dtype=float)[..., None] / self.payment
+        start_balance = np.asarray(start_balance, dtype=float)[..., None]
+        return (amortized * self.balance[1:n_months + 1]
+                + (start_balance - amortized) * self.growth[1:n_months + 1])
+
+
+def _unit_schedule(rate: float, term_months: int) -> UnitSchedule:
+    payment = float(-npf.pmt(rate, term_months, 1))
+    growth = np.empty(term_months + 1)
+    growth[0] = 1
+    growth[1:] = np.cumprod(np.full(term_months, 1 + rate))
+    balance = np.empty(term_months + 1)
+    balance[0] = 1
+    balance[1:] = linear_recurrence(1.0, np.full(term_months, 1 + rate), np.full(term_months, -payment))
+    interest = balance[:-1] * rate
+    principal = payment - interest
+    for array in (balance, interest, principal, growth):
+        array.setflags(write=False)
+    return UnitSchedule(rate, term_months, payment, balance, interest, principal, growth)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class AmortizationCache:
+    """
+    LRU cache of UnitSchedules keyed by (periodic rate, term in months), evicting
+    the least recently used ones once they take more than max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._schedules: "OrderedDict[Tuple[float, int], UnitSchedule]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, rate: float, term_months: int) -> UnitSchedule:
+        key = (float(rate), int(term_months))
+        with self._lock:
+            schedule = self._schedules.get(key)
+            if schedule is not None:
+                self._schedules.move_to_end(key)
+                self.stats.hits += 1
+                return schedule
+            self.stats.misses += 1
+
+        schedule = _unit_schedule(*key)
+        with self._lock:
+            if key not in self._schedules:
+                self._schedules[key] = schedule
+                self._nbytes += schedule.nbytes
+            while self._nbytes > self.max_bytes and len(self._schedules) > 1:
+                _, evicted = self._schedules.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self.stats.evictions += 1
+        return schedule
+
+    def clear(self) -> None:
+        with self._lock:
+            self._schedules.clear()
+            self._nbytes = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**vars(self.stats), "cached": len(self._schedules), "nbytes": self._nbytes}
+
+
+# shared by every simulation in the process
+SCHEDULE_CACHE = AmortizationCache()
+
+
+def unit_schedule(rate: float, term_months: int) -> UnitSchedule:
+    return SCHEDULE_CACHE.get(rate, term_months)
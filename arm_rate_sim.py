@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from datetime import date
+from mortgage_calc import (
+    SIMULATION_LENGTH_MONTHS,
+    YearlyRateType,
+    arm_adjustment_schedule,
+    loan_cash_flows,
+    ownership_costs,
+    periodic_interest_rate,
+)
+from mortgage_input import MortgageInput
+from sim_utils import month_dates
+from typing import List, Optional
+
+import numpy as np
+
+
+@dataclass
+class RateIndexModel:
+    # "vasicek" or "cir"
+    kind: str = "vasicek"
+    initial_index: float = 0.04
+    long_run_index: float = 0.04
+    # yearly speed at which the index is pulled back to long_run_index
+    mean_reversion: float = 0.2
+    # yearly, the CIR volatility is scaled by the square root of the index
+    volatility: float = 0.01
+    # note rate = index + margin, defaults to the loan rate minus initial_index
+    margin: Optional[float] = None
+    # lowest note rate, defaults to the margin
+    rate_floor: Optional[float] = None
+    n_paths: int = 10_000
+    seed: int = 42
+
+
+@dataclass
+class ARMSimulationOutput:
+    input: MortgageInput
+    model: RateIndexModel
+    ds: List[date]
+    reset_months: np.ndarray
+    # shape: (n_paths, n_resets), yearly rates from each reset month on
+    index_rates: np.ndarray
+    note_rates: np.ndarray
+    # shape: (n_paths, n_months), principal and interest only
+    payment: np.ndarray
+    interest_payment: np.ndarray
+
+    @property
+    def total_interest(self) -> np.ndarray:
+        return self.interest_payment.sum(axis=1)
+
+
+def _noncentral_chisquare(rng: np.random.Generator, df: float, nonc: np.ndarray) -> np.ndarray:
+    """
+    rng.noncentral_chisquare, also for df = 0 (no mean reversion or a long-run
+    index of 0), where numpy raises: a chi-square with 2 * Poisson(nonc / 2)
+    degrees of freedom, which is 0 when the Poisson draw is.
+    """
+    if df > 0:
+        return rng.noncentral_chisquare(df, nonc)
+    return 2 * rng.gamma(rng.poisson(nonc / 2))
+
+
+def simulate_index(
+    model: RateIndexModel,
+    times: np.ndarray,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Exact draws of the short-rate index at times (years, increasing), no
+    stepping through the months in between.
+    Returns: shape (n_paths, len(times))
+    """
+    k, theta, sigma = model.mean_reversion, model.long_run_index, model.volatility
+    index = np.empty((model.n_paths, len(times)))
+    rate = np.full(model.n_paths, model.initial_index)
+    for j, dt in enumerate(np.diff(times, prepend=0.0)):
+        decay = np.exp(-k * dt)
+        if model.kind == "vasicek":
+            std = sigma * np.sqrt((1 - decay ** 2) / (2 * k)) if k > 0 else sigma * np.sqrt(dt)
+            rate = theta + (rate - theta) * decay + std * rng.standard_normal(model.n_paths)
+        elif model.kind == "cir":
+            if sigma == 0:
+                rate = theta + (rate - theta) * decay
+            else:
+                # (1 - decay) / k tends to dt as k goes to 0
+                scale = sigma ** 2 * ((1 - decay) / (4 * k) if k > 0 else dt / 4)
+                rate = scale * _noncentral_chisquare(
+                    rng, 4 * k * theta / sigma ** 2, np.maximum(rate, 0) * decay / scale)
+        else:
+            raise ValueError(f"Unknown rate model: {model.kind}")
+        index[:, j] = rate
+    return index
+
+
+def run_arm_rate_simulation(
+    input: MortgageInput,
+    model: RateIndexModel,
+    simulation_length_months: int = SIMULATION_LENGTH_MONTHS,
+) -> ARMSimulationOutput:
+    """
+    ARM loan under random index paths. At each reset the note rate moves toward
+    index + margin by at most the initial / annual cap (up or down) and stays
+    between rate_floor and the lifetime cap. Index draws and payments are only
+    computed at reset months, all paths at once.
+    """
+    if not (input.is_arm and input.arm_rates):
+        raise ValueError("ARM rate simulation needs an ARM loan")
+    n = simulation_length_months
+    arm_input = input.arm_rates
+    initial_rate = input.mortgage_interest_rate
+    margin = model.margin if model.margin is not None else initial_rate - model.initial_index
+    rate_floor = model.rate_floor if model.rate_floor is not None else margin
+    rate_ceiling = initial_rate + arm_input.lifetime_arm_cap
+
+    schedule = arm_adjustment_schedule(arm_input, input.loan_term * 12, n)
+    reset_months = np.array([month for month, _ in schedule], dtype=int)
+    rng = np.random.default_rng(model.seed)
+    index_rates = simulate_index(model, reset_months / 12, rng)
+
+    note_rates = np.empty_like(index_rates)
+    rate = np.full(model.n_paths, initial_rate)
+    for j, (_, monthly_cap) in enumerate(schedule):
+        cap = monthly_cap * 12
+        rate = np.clip(index_rates[:, j] + margin, rate - cap, rate + cap)
+        rate = np.clip(rate, min(rate_floor, rate_ceiling), rate_ceiling)
+        note_rates[:, j] = rate
+
+    pir = periodic_interest_rate(
+        mortgage_interest_rate=initial_rate, interest_rate_type=YearlyRateType.APR)
+    monthly_operating_expenses, monthly_mortgage, _ = ownership_costs(
+        input=input,
+        periodic_interest_rate=pir,
+    )
+    # same convention as the deterministic ARM: the change is added to the periodic rate
+    loan = loan_cash_flows(
+        monthly_operating_expenses=monthly_operating_expenses,
+        periodic_mortgage_payment=monthly_mortgage,
+        input=input,
+        periodic_interest_rate=pir,
+        simulation_length_months=n,
+        arm_reset_rates=list((pir + (note_rates - initial_rate) / 12).T),
+    )
+
+    return ARMSimulationOutput(
+        input=input,
+        model=model,
+        ds=list(month_dates(input.purchase_date, n)),
+        reset_months=reset_months,
+        index_rates=index_rates,
+        note_rates=note_rates,
+        payment=np.broadcast_to(loan["payment"], (model.n_paths, n)),
+        interest_payment=np.broadcast_to(loan["interest_payment"], (model.n_paths, n)),
+    )
@@ -0,0 +1,330 @@
+"""
+Score scenario files without the Streamlit app.
+
+    python batch_cli.py mortgage scenarios.csv results/ --workers 4
+    python batch_cli.py monte-carlo portfolios.parquet results/
+
+Every input row is one scenario, columns are named after the MortgageInput /
+MonteCarloInput fields (see MORTGAGE_COLUMNS / MONTE_CARLO_COLUMNS). The input
+is streamed in chunks of --chunk-size rows and each chunk is written to its own
+Parquet file in the output directory, which pandas / pyarrow read as one
+dataset. Rerunning the same command after an interruption skips the chunks
+that were already written.
+"""
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import fields
+from datetime import date
+from monte_carlo_sim import MonteCarloInput, run_monte_carlo_summary
+from mortgage_batch import run_mortgage_batch
+from mortgage_input import ARMRates, MortgageInput
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import argparse
+import json
+import numpy as np
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import sys
+import time
+
+
+# optional columns of a mortgage file and their defaults, ARM caps are yearly
+MORTGAGE_DEFAULTS = {
+    "is_arm": False,
+    "purchase_date": None,
+    "arm_fixed_period": ARMRates.fixed_period,
+    "arm_initial_cap": ARMRates.initial_arm_cap,
+    "arm_annual_cap": ARMRates.annual_arm_cap,
+    "arm_lifetime_cap": ARMRates.lifetime_arm_cap,
+}
+MORTGAGE_COLUMNS = tuple(
+    f.name for f in fields(MortgageInput) if f.name not in ("arm_rates",)
+) + tuple(k for k in MORTGAGE_DEFAULTS if k.startswith("arm_"))
+
+MONTE_CARLO_DEFAULTS = {"seed": 42}
+MONTE_CARLO_COLUMNS = tuple(f.name for f in fields(MonteCarloInput)) + tuple(MONTE_CARLO_DEFAULTS)
+
+# rows with the same values here share one vectorized run_mortgage_batch call
+MORTGAGE_GROUP_COLUMNS = (
+    "loan_term",
+    "is_arm",
+    "purchase_date",
+    "should_add_closing_to_loan",
+    "arm_fixed_period",
+    "arm_initial_cap",
+    "arm_annual_cap",
+    "arm_lifetime_cap",
+)
+
+# CSV column types, pyarrow would otherwise guess them from the first block
+# and fail on a float further down a column that starts with whole numbers
+MORTGAGE_COLUMN_TYPES = {
+    name: pa.bool_() if name in ("is_arm", "should_add_closing_to_loan")
+    else pa.date32() if name == "purchase_date" else pa.float64()
+    for name in MORTGAGE_COLUMNS
+}
+MONTE_CARLO_COLUMN_TYPES = {
+    name: pa.int64() if name == "seed" else pa.float64() for name in MONTE_CARLO_COLUMNS}
+
+MANIFEST = "_manifest.json"
+
+
+def read_chunks(path: Path, chunk_size: int, column_types: Optional[dict] = None) -> Iterator[pa.Table]:
+    """
+    Streams a CSV or Parquet file.
+    column_types: {column: pyarrow type} of a CSV file, other columns are inferred
+    Returns: tables of exactly chunk_size rows, except the last one
+    """
+    if path.suffix == ".parquet":
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size)
+    else:
+        batches = pa_csv.open_csv(
+            path, convert_options=pa_csv.ConvertOptions(column_types=column_types or {}))
+
+    pending: List[pa.RecordBatch] = []
+    n_pending = 0
+    for batch in batches:
+        pending.append(batch)
+        n_pending += batch.num_rows
+        while n_pending >= chunk_size:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_size)
+            rest = table.slice(chunk_size)
+            pending, n_pending = rest.to_batches(), rest.num_rows
+    if n_pending:
+        yield pa.Table.from_batches(pending)
+
+
+def _with_defaults(df: pd.DataFrame, columns: Tuple[str, ...], defaults: dict) -> pd.DataFrame:
+    missing = [c for c in columns if c not in df.columns and c not in defaults]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    return df.assign(**{k: v for k, v in defaults.items() if k not in df.columns})
+
+
+def score_mortgage_chunk(
+    df: pd.DataFrame,
+    simulation_length_months: int,
+    default_purchase_date: date,
+) -> pd.DataFrame:
+    """
+    default_purchase_date: for rows without a purchase_date
+    Returns: one row of summary metrics per scenario, in input order
+    """
+    df = _with_defaults(df, MORTGAGE_COLUMNS, MORTGAGE_DEFAULTS)
+    df["purchase_date"] = [
+        default_purchase_date if pd.isna(d) else pd.Timestamp(d).date() for d in df["purchase_date"]]
+    df["is_arm"] = df["is_arm"].astype(bool)
+    df["should_add_closing_to_loan"] = df["should_add_closing_to_loan"].astype(bool)
+    numeric = [f.name for f in fields(MortgageInput)
+               if f.name in MORTGAGE_COLUMNS and f.name not in MORTGAGE_GROUP_COLUMNS]
+
+    out = pd.DataFrame(index=df.index, columns=[
+        "final_net_worth_buy",
+        "final_net_worth_rent",
+        "final_net_worth_gap",
+        "break_even_month",
+        "min_cash_reserve",
+        "negative_cash_months",
+        "total_interest_paid",
+    ], dtype=float)
+    for key, group in df.groupby(list(MORTGAGE_GROUP_COLUMNS), sort=False, dropna=False):
+        settings = dict(zip(MORTGAGE_GROUP_COLUMNS, key))
+        arm_rates = ARMRates(
+            fixed_period=int(settings["arm_fixed_period"]),
+            initial_arm_cap=float(settings["arm_initial_cap"]),
+            annual_arm_cap=float(settings["arm_annual_cap"]),
+            lifetime_arm_cap=float(settings["arm_lifetime_cap"]),
+        ) if settings["is_arm"] else None
+        input = MortgageInput(
+            **{f: group[f].to_numpy(dtype=float) for f in numeric},
+            loan_term=int(settings["loan_term"]),
+            should_add_closing_to_loan=bool(settings["should_add_closing_to_loan"]),
+            arm_rates=arm_rates,
+            is_arm=bool(settings["is_arm"]),
+            purchase_date=settings["purchase_date"],
+        )
+        columns = run_mortgage_batch(
+            input,
+            simulation_length_months=simulation_length_months,
+            columns=("net_worth_after_sale", "net_worth_if_renting", "cash_reserve",
+                     "total_interest_paid"),
+        ).columns
+        buy, rent = columns["net_worth_after_sale"], columns["net_worth_if_renting"]
+        buy_ahead = buy >= rent
+        out.loc[group.index] = np.column_stack([
+            buy[:, -1],
+            rent[:, -1],
+            buy[:, -1] - rent[:, -1],
+            np.where(buy_ahead.any(axis=1), buy_ahead.argmax(axis=1), -1),
+            columns["cash_reserve"].min(axis=1),
+            (columns["cash_reserve"] < 0).sum(axis=1),
+            columns["total_interest_paid"][:, -1],
+        ])
+    return out.astype({"break_even_month": int, "negative_cash_months": int})
+
+
+def score_monte_carlo_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns: one row of final value statistics per scenario, in input order
+    """
+    df = _with_defaults(df, MONTE_CARLO_COLUMNS, MONTE_CARLO_DEFAULTS)
+    rows = []
+    for row in df.itertuples(index=False):
+        values = row._asdict()
+        input = MonteCarloInput(**{
+            f.name: (int if f.type is int else float)(values[f.name]) for f in fields(MonteCarloInput)})
+        summary = run_monte_carlo_summary(input, seed=int(values["seed"]))
+        rows.append({
+            "final_mean": float(summary.mean_path[-1]),
+            "final_p10": summary.final_percentile(10),
+            "final_p50": summary.final_percentile(50),
+            "final_p90": summary.final_percentile(90),
+        })
+    return pd.DataFrame(rows, index=df.index)
+
+
+def _part_path(output_dir: Path, chunk_index: int) -> Path:
+    return output_dir / f"part-{chunk_index:06d}.parquet"
+
+
+def run_chunk(
+    kind: str,
+    table: pa.Table,
+    first_row: int,
+    chunk_index: int,
+    output_dir: Path,
+    simulation_length_months: int,
+    default_purchase_date: date,
+) -> int:
+    """
+    Scores one chunk and writes its part file, which only appears once complete.
+    Returns: number of scenarios written
+    """
+    df = table.to_pandas()
+    if kind == "mortgage":
+        scores = score_mortgage_chunk(df, simulation_length_months, default_purchase_date)
+    else:
+        scores = score_monte_carlo_chunk(df)
+    scores.insert(0, "row", np.arange(first_row, first_row + len(df)))
+    if "scenario_id" in df.columns:
+        scores.insert(1, "scenario_id", df["scenario_id"].to_numpy())
+
+    part = _part_path(output_dir, chunk_index)
+    tmp = part.with_suffix(".tmp")
+    scores.to_parquet(tmp, index=False)
+    os.replace(tmp, part)
+    return len(scores)
+
+
+def _previous_manifest(output_dir: Path) -> Optional[dict]:
+    path = output_dir / MANIFEST
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+def _check_manifest(output_dir: Path, manifest: dict) -> None:
+    previous = _previous_manifest(output_dir)
+    if previous is None:
+        (output_dir / MANIFEST).write_text(json.dumps(manifest, indent=2) + "\n")
+    elif previous != manifest:
+        raise SystemExit(
+            f"{output_dir} holds results of a different run ({previous}), "
+            "use a new output directory")
+
+
+def run_batch(
+    kind: str,
+    input_path: Path,
+    output_dir: Path,
+    chunk_size: int = 1000,
+    n_workers: Optional[int] = None,
+    simulation_length_months: int = 30*12,
+    default_purchase_date: Optional[date] = None,
+) -> int:
+    """
+    default_purchase_date: for mortgage rows without a purchase_date, defaults
+        to the date the output directory was started, so a run resumed on a
+        later day scores its remaining chunks with the same date
+    Returns: number of scenarios scored in this call, skipped chunks excluded
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if default_purchase_date is None:
+        previous = _previous_manifest(output_dir) or {}
+        default_purchase_date = date.fromisoformat(
+            previous.get("default_purchase_date") or date.today().isoformat())
+    _check_manifest(output_dir, {
+        "kind": kind,
+        "input": str(input_path.resolve()),
+        "chunk_size": chunk_size,
+        "simulation_length_months": simulation_length_months,
+        "default_purchase_date": default_purchase_date.isoformat(),
+    })
+    n_workers = n_workers or os.cpu_count() or 1
+    column_types = MORTGAGE_COLUMN_TYPES if kind == "mortgage" else MONTE_CARLO_COLUMN_TYPES
+    started = time.perf_counter()
+    done = 0
+
+    def report(n_rows: int) -> None:
+        nonlocal done
+        done += n_rows
+        rate = done / (time.perf_counter() - started) * 3600
+        print(f"{done:,} scenarios ({rate:,.0f}/hour)", file=sys.stderr, flush=True)
+
+    chunks = (
+        (table, i * chunk_size, i)
+        for i, table in enumerate(read_chunks(input_path, chunk_size, column_types))
+        if not _part_path(output_dir, i).exists()
+    )
+    if n_workers == 1:
+        for table, first_row, i in chunks:
+            report(run_chunk(
+                kind, table, first_row, i, output_dir, simulation_length_months, default_purchase_date))
+        return done
+
+    # at most two chunks per worker are read ahead, which bounds memory
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        pending: set[Future] = set()
+        for table, first_row, i in chunks:
+            if len(pending) >= 2 * n_workers:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    report(future.result())
+            pending.add(pool.submit(
+                run_chunk, kind, table, first_row, i, output_dir, simulation_length_months,
+                default_purchase_date))
+        for future in wait(pending).done:
+            report(future.result())
+    return done
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=("mortgage", "monte-carlo"))
+    parser.add_argument("input", type=Path, help="CSV or Parquet file, one scenario per row")
+    parser.add_argument("output", type=Path, help="directory for the Parquet part files")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the number of CPUs")
+    parser.add_argument("--months", type=int, default=30*12, help="mortgage simulation length")
+    parser.add_argument("--purchase-date", type=date.fromisoformat, default=None,
+                        help="YYYY-MM-DD for mortgage rows without one, defaults to the day the "
+                             "output directory was started")
+    args = parser.parse_args(argv)
+
+    run_batch(
+        "mortgage" if args.kind == "mortgage" else "monte_carlo",
+        args.input,
+        args.output,
+        chunk_size=args.chunk_size,
+        n_workers=args.workers,
+        simulation_length_months=args.months,
+        default_purchase_date=args.purchase_date,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Latency of a running calc_service instance under concurrent load.
+
+    python calc_service.py --port 8000 &
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --requests 500 --concurrency 16
+
+Requests cycle through --distinct different inputs (the monthly rent / stock
+return is varied), so with fewer distinct inputs than requests the cache and
+request coalescing are exercised.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import argparse
+import json
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from run_benchmarks import MONTE_CARLO_INPUT, SIMULATION_KWARGS  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+
+def request_body(endpoint: str, i: int) -> dict:
+    if endpoint == "/monte-carlo":
+        return {**vars(MONTE_CARLO_INPUT), "stock_mean": 0.04 + 0.001 * i}
+    return {**SIMULATION_KWARGS, "monthly_rent": 4_000.0 + 10 * i}
+
+
+def post(url: str, body: dict) -> float:
+    """
+    Returns: seconds until the full response was read
+    """
+    data = json.dumps(body).encode()
+    start = time.perf_counter()
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", choices=("/rent-vs-buy", "/monte-carlo"), default="/rent-vs-buy")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--distinct", type=int, default=50, help="number of different inputs")
+    args = parser.parse_args(argv)
+
+    bodies = [request_body(args.endpoint, i % args.distinct) for i in range(args.requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = np.array(list(pool.map(lambda b: post(args.url + args.endpoint, b), bodies)))
+    elapsed = time.perf_counter() - start
+
+    with urllib.request.urlopen(args.url + "/stats") as response:
+        stats = json.loads(response.read())
+    print(f"{args.requests} requests in {elapsed:.2f}s ({args.requests / elapsed:,.1f}/s), "
+          f"concurrency {args.concurrency}, {args.distinct} distinct inputs")
+    print(f"p50 {np.percentile(latencies, 50) * 1e3:.1f} ms  "
+          f"p99 {np.percentile(latencies, 99) * 1e3:.1f} ms  "
+          f"max {latencies.max() * 1e3:.1f} ms")
+    print(f"server: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Cold start and rerun latency of the Rent vs Buy page under Streamlit's AppTest,
+each repetition in a fresh interpreter so imports are paid again.
+
+    python benchmarks/page_load.py --repeat 5
+
+Reports the median of:
+- import: importing the page's modules, with the heavy libraries they loaded
+- first load: the first run of the page, before the form is submitted
+- submit: submitting the form with its defaults
+- rerun: moving the date range slider, which rebuilds only the selected view
+The result cache is memory only here, so every submit recomputes. Streamlit
+itself imports plotly.graph_objects (for its chart theme), so it shows up as
+loaded even though the page only imports it with its first plotly chart.
+"""
+from pathlib import Path
+from typing import List, Optional
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGE = ROOT / "Rent_vs_Buy.py"
+HEAVY_MODULES = ("pandas", "matplotlib", "plotly.graph_objects")
+STEPS = ("import", "first load", "submit", "rerun")
+
+
+def _measure_once() -> dict:
+    sys.path.insert(0, str(ROOT))
+    start = time.perf_counter()
+    import streamlit  # noqa: F401
+    import ui.mortgage_calc.form  # noqa: F401
+    import ui.mortgage_calc.tabs  # noqa: F401
+    import ui.mortgage_calc.summary_stats  # noqa: F401
+    seconds = {"import": time.perf_counter() - start}
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(PAGE), default_timeout=120)
+    start = time.perf_counter()
+    app.run()
+    seconds["first load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    app.button[0].click().run()
+    seconds["submit"] = time.perf_counter() - start
+
+    slider = next(s for s in app.slider if s.label.startswith("Select date range"))
+    first, last = slider.value
+    start = time.perf_counter()
+    slider.set_value((first, first.replace(year=first.year + 10))).run()
+    seconds["rerun"] = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(app.exception)
+    return {"seconds": seconds, "loaded": loaded}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_measure_once()))
+        return 0
+
+    runs = []
+    for _ in range(args.repeat):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child"], capture_output=True, text=True, check=True, cwd=ROOT,
+            env={**os.environ, "FINANCIAL_CALC_CACHE_DIR": ""},
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'step':<12} {'median':>10} {'min':>10}")
+    for step in STEPS:
+        times = sorted(run["seconds"][step] for run in runs)
+        print(f"{step:<12} {times[len(times) // 2] * 1e3:>7.0f} ms {times[0] * 1e3:>7.0f} ms")
+    print(f"loaded by the imports: {', '.join(runs[0]['loaded']) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Wall time and peak memory of the simulation engines, compared against a JSON
+baseline.
+
+    python benchmarks/run_benchmarks.py --save          # record the baseline
+    python benchmarks/run_benchmarks.py                 # compare, exit 1 on a regression
+    python benchmarks/run_benchmarks.py --suite full    # adds 100k / 1M simulation cases
+"""
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from arm_rate_sim import RateIndexModel, run_arm_rate_simulation  # noqa: E402
+from historical_returns import HistoricalReturns  # noqa: E402
+from monte_carlo_sim import (  # noqa: E402
+    MonteCarloInput,
+    PrecisionTarget,
+    run_monte_carlo,
+    run_monte_carlo_adaptive,
+    run_monte_carlo_summary,
+)
+from mortgage_calc import build_mortgage_inputs, run_mortgage_calc, run_mortgage_simulation  # noqa: E402
+from mortgage_input import ARMRates  # noqa: E402
+from multi_asset_sim import PortfolioInput, covariance_from, run_multi_asset_simulation  # noqa: E402
+from rental_sim import calculate_monthly_rental_cost  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# the Rent vs Buy form defaults
+SIMULATION_KWARGS = dict(
+    home_price=1_250_000.0,
+    downpayment=800_000.0,
+    loan_options={
+        "30-year fixed": {"term": 30, "rate": 0.065},
+        "15-year fixed": {"term": 15, "rate": 0.0575},
+        "5/1 ARM": {"term": 30, "rate": 0.0525},
+    },
+    property_appreciation=0.02,
+    starting_cash=1_200_000.0,
+    realtor_fee_at_sale=0.06,
+    capital_gains_tax=0.3,
+    monthly_rent=6_000.0,
+    rental_increase_pct=0.017,
+    stock_interest_rate=0.06,
+    monthly_income_saved=6_500.0,
+    yearly_increase=0.025,
+    closing_cost_percentage=0.025,
+    property_tax_rate=0.011,
+    should_add_closing_to_loan=False,
+    monthly_pmi=0.0,
+    monthly_hoa=0.0,
+    monthly_insurance=490.0,
+    monthly_maintenance_fund=200.0,
+)
+
+# the Monte Carlo page defaults
+MONTE_CARLO_INPUT = MonteCarloInput(
+    years=30,
+    n_simulations=1_000,
+    stock_start=600_000.0,
+    cash_start=600_000.0,
+    withdraw_year=5,
+    withdraw_stock=200_000.0,
+    withdraw_cash=100_000.0,
+    stock_mean=0.065,
+    stock_vol=0.18,
+    cash_mean=0.03,
+    cash_vol=0.005,
+    monthly_stock_contribution=0.0,
+    monthly_cash_contribution=0.0,
+)
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    run: Callable[[], object]
+    # "quick" cases run in every suite, "full" cases only in the full suite
+    suite: str = "quick"
+
+
+def _cases() -> List[BenchmarkCase]:
+    cases = []
+    base = build_mortgage_inputs(**SIMULATION_KWARGS)["30-year fixed"]
+    for term in (15, 30, 40):
+        fixed = replace(base, loan_term=term)
+        arm = replace(fixed, mortgage_interest_rate=0.0525, is_arm=True, arm_rates=ARMRates())
+        cases.append(BenchmarkCase(f"run_mortgage_calc/fixed-{term}y", lambda i=fixed: run_mortgage_calc(i)))
+        cases.append(BenchmarkCase(f"run_mortgage_calc/arm-{term}y", lambda i=arm: run_mortgage_calc(i)))
+
+    # without mean reversion both models fall back to their k -> 0 limits
+    arm = replace(base, mortgage_interest_rate=0.0525, is_arm=True, arm_rates=ARMRates())
+    for kind, volatility in (("vasicek", 0.01), ("cir", 0.05)):
+        for mean_reversion, label in ((0.2, ""), (0.0, "-no-reversion")):
+            model = RateIndexModel(kind=kind, mean_reversion=mean_reversion, volatility=volatility)
+            cases.append(BenchmarkCase(
+                f"run_arm_rate_simulation/{kind}{label}", lambda m=model: run_arm_rate_simulation(arm, m)))
+
+    fixed_only = {**SIMULATION_KWARGS, "loan_options": {
+        k: v for k, v in SIMULATION_KWARGS["loan_options"].items() if k != "5/1 ARM"}}
+    cases.append(BenchmarkCase(
+        "run_mortgage_simulation/fixed", lambda: run_mortgage_simulation(**fixed_only)))
+    cases.append(BenchmarkCase(
+        "run_mortgage_simulation/fixed+arm", lambda: run_mortgage_simulation(**SIMULATION_KWARGS)))
+
+    for years in (15, 30, 40):
+        cases.append(BenchmarkCase(
+            f"calculate_monthly_rental_cost/{years}y",
+            lambda n=years * 12: calculate_monthly_rental_cost(n, base),
+        ))
+
+    # full paths are kept in memory, 1M simulations only run through the streaming summary
+    for n_simulations, suite in ((1_000, "quick"), (10_000, "quick"), (100_000, "full")):
+        input = replace(MONTE_CARLO_INPUT, n_simulations=n_simulations)
+        cases.append(BenchmarkCase(
+            f"run_monte_carlo/{n_simulations // 1000}k", lambda i=input: run_monte_carlo(i), suite))
+    for years in (15, 40):
+        input = replace(MONTE_CARLO_INPUT, years=years, n_simulations=10_000)
+        cases.append(BenchmarkCase(f"run_monte_carlo/10k-{years}y", lambda i=input: run_monte_carlo(i)))
+    input = replace(MONTE_CARLO_INPUT, n_simulations=10_000)
+    for sampling in ("antithetic", "sobol"):
+        cases.append(BenchmarkCase(
+            f"run_monte_carlo/10k-{sampling}", lambda i=input, s=sampling: run_monte_carlo(i, sampling=s)))
+    # 100 years of fat-tailed monthly stock returns
+    rng = np.random.default_rng(0)
+    history = HistoricalReturns(stock=0.005 + 0.04 * rng.standard_t(4, 1200), cash=np.full(1200, 0.0025))
+    cases.append(BenchmarkCase(
+        "run_monte_carlo/10k-bootstrap",
+        lambda i=input: run_monte_carlo(i, sampling="bootstrap", history=history)))
+    cases.append(BenchmarkCase(
+        "run_monte_carlo/10k-control-variate", lambda i=input: run_monte_carlo(i, control_variate=True)))
+    # 2% wide 95% confidence intervals on the final median and 10th percentile
+    for sampling in ("pseudo", "sobol"):
+        cases.append(BenchmarkCase(
+            f"run_monte_carlo_adaptive/2pct-{sampling}",
+            lambda s=sampling: run_monte_carlo_adaptive(MONTE_CARLO_INPUT, PrecisionTarget(), sampling=s)))
+    for n_simulations, suite in ((100_000, "quick"), (1_000_000, "full")):
+        input = replace(MONTE_CARLO_INPUT, n_simulations=n_simulations)
+        cases.append(BenchmarkCase(
+            f"run_monte_carlo_summary/{n_simulations // 1000}k",
+            lambda i=input: run_monte_carlo_summary(i), suite))
+    # 10 assets, equally correlated, rebalanced yearly
+    portfolio = PortfolioInput(
+        names=tuple(f"asset {i}" for i in range(10)),
+        start_balances=np.full(10, 100_000.0),
+        annual_means=np.linspace(0.02, 0.08, 10),
+        annual_covariance=covariance_from(np.linspace(0.01, 0.25, 10), np.full((10, 10), 0.3) + 0.7 * np.eye(10)),
+    )
+    for n_simulations, suite in ((10_000, "quick"), (100_000, "full")):
+        input = replace(portfolio, n_simulations=n_simulations)
+        cases.append(BenchmarkCase(
+            f"run_multi_asset_simulation/10x{n_simulations // 1000}k",
+            lambda i=input: run_multi_asset_simulation(i), suite))
+    return cases
+
+
+def measure(case: BenchmarkCase, min_runs: int = 3, min_seconds: float = 1.0) -> dict:
+    """
+    Times the case without tracemalloc (it slows Python code down), then runs it
+    once more under tracemalloc for the peak memory.
+    Returns: {"seconds": fastest run, "median_seconds", "runs", "peak_mb"}
+    """
+    case.run()
+    times = []
+    while len(times) < min_runs or sum(times) < min_seconds:
+        start = time.perf_counter()
+        case.run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": min(times),
+        "median_seconds": float(np.median(times)),
+        "runs": len(times),
+        "peak_mb": peak / 2 ** 20,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Returns: the cases whose fastest run is more than threshold slower than in the baseline
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("cases", {}).get(name)
+        if before and result["seconds"] > before["seconds"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def _environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", choices=("quick", "full"), default="quick")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true",
+                        help="write the results to the baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown before a case fails, 0.2 = 20%%")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    results = {}
+    print(f"{'case':<40} {'time':>10} {'baseline':>10} {'change':>8} {'peak':>10}")
+    for case in _cases():
+        if (args.suite == "quick" and case.suite != "quick") or args.filter not in case.name:
+            continue
+        result = results[case.name] = measure(case)
+        before = baseline.get("cases", {}).get(case.name)
+        change = f"{result['seconds'] / before['seconds'] - 1:+.0%}" if before else ""
+        before_ms = f"{before['seconds'] * 1e3:.2f} ms" if before else ""
+        print(f"{case.name:<40} {result['seconds'] * 1e3:>7.2f} ms {before_ms:>10} {change:>8} "
+              f"{result['peak_mb']:>7.1f} MB", flush=True)
+
+    if args.save:
+        # cases that were not run keep their previous baseline
+        cases = {**baseline.get("cases", {}), **results}
+        args.baseline.write_text(json.dumps(
+            {"environment": _environment(), "cases": cases}, indent=2, sort_keys=True) + "\n")
+        print(f"Saved {len(results)} cases to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"No baseline at {args.baseline}, run with --save first")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for name in regressions:
+        print(f"REGRESSION {name}: more than {args.threshold:.0%} slower than the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Local HTTP JSON service for the calculators.
+
+    python calc_service.py --port 8000 --workers 4
+
+    POST /rent-vs-buy   body: run_mortgage_simulation arguments, plus an optional
+                        "columns" list to limit the returned columns
+    POST /monte-carlo   body: MonteCarloInput fields, plus optional "sampling" and
+                        "control_variate" run_monte_carlo arguments, and a
+                        "precision" object of PrecisionTarget fields to pick
+                        n_simulations with run_monte_carlo_adaptive
+    GET  /stats         cache and coalescing counters
+
+Simulations run in a process pool. Identical requests that arrive while one is
+being computed wait for that computation instead of starting their own, and
+answers are kept in a bounded LRU cache.
+"""
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from monte_carlo_sim import MonteCarloInput, PrecisionTarget, run_monte_carlo, run_monte_carlo_adaptive
+from mortgage_calc import run_mortgage_simulation
+from typing import Callable, Optional, Tuple
+
+import argparse
+import json
+import threading
+
+
+def rent_vs_buy(params: dict) -> dict:
+    params = dict(params)
+    columns = params.pop("columns", None)
+    results = run_mortgage_simulation(**params)
+    return {
+        label: {
+            "ds": [d.isoformat() for d in result.ds],
+            **{name: result[name].tolist() for name in result
+               if columns is None or name in columns},
+        }
+        for label, result in results.items()
+    }
+
+
+def monte_carlo(params: dict) -> dict:
+    params = dict(params)
+    sampling = params.pop("sampling", "pseudo")
+    control_variate = params.pop("control_variate", False)
+    precision = params.pop("precision", None)
+    if precision is None:
+        output = run_monte_carlo(MonteCarloInput(**params), sampling=sampling, control_variate=control_variate)
+    else:
+        output = run_monte_carlo_adaptive(
+            MonteCarloInput(**{"n_simulations": 0, **params}),
+            PrecisionTarget(**precision),
+            sampling=sampling,
+            control_variate=control_variate,
+        )
+    return {
+        "n_simulations": output.input.n_simulations,
+        "median_path": output.median_path.tolist(),
+        "p10_path": output.percentile_path(10).tolist(),
+        "p90_path": output.percentile_path(90).tolist(),
+        **{f"final_{name}": estimate.value for name, estimate in output.final_estimates.items()},
+        **{f"final_{name}_se": estimate.standard_error for name, estimate in output.final_estimates.items()},
+        **({"target_met": output.convergence.target_met} if output.convergence else {}),
+    }
+
+
+ENDPOINTS: dict[str, Callable[[dict], dict]] = {
+    "/rent-vs-buy": rent_vs_buy,
+    "/monte-carlo": monte_carlo,
+}
+
+
+@dataclass
+class ServiceStats:
+    computed: int = 0
+    # served from the cache
+    cache_hits: int = 0
+    # waited on an identical request that was already being computed
+    coalesced: int = 0
+    errors: int = 0
+
+
+class CoalescingCache:
+    """
+    Answers requests from an LRU cache of encoded responses, and makes
+    concurrent identical requests share one computation in the pool.
+    """
+
+    def __init__(self, pool: ProcessPoolExecutor, max_size: int = 1024):
+        self.pool = pool
+        self.max_size = max_size
+        self.stats = ServiceStats()
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._in_flight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str, params: dict) -> bytes:
+        key = json.dumps([endpoint, params], sort_keys=True)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats.cache_hits += 1
+                return self._cache[key]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+                self.stats.computed += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not owner:
+            return future.result()
+        try:
+            body = json.dumps(self.pool.submit(ENDPOINTS[endpoint], params).result()).encode()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+                self.stats.errors += 1
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            self._cache[key] = body
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        future.set_result(body)
+        return body
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **vars(self.stats),
+                "cached": len(self._cache),
+                "in_flight": len(self._in_flight),
+            }
+
+
+def make_handler(cache: CoalescingCache) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status: int, body: bytes) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status: int, message: str) -> None:
+            self._reply(status, json.dumps({"error": message}).encode())
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(200, json.dumps(cache.snapshot()).encode())
+            else:
+                self._error(404, f"Unknown path {self.path}")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = self.rfile.read(length)
+            if self.path not in ENDPOINTS:
+                return self._error(404, f"Unknown path {self.path}")
+            try:
+                params = json.loads(payload or b"{}")
+                if not isinstance(params, dict):
+                    raise ValueError("Request body must be a JSON object")
+            except ValueError as e:
+                return self._error(400, str(e))
+            try:
+                self._reply(200, cache.get(self.path, params))
+            except (TypeError, ValueError, KeyError) as e:
+                self._error(400, f"{type(e).__name__}: {e}")
+            except Exception as e:
+                self._error(500, f"{type(e).__name__}: {e}")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class CalcServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 resets connections under bursts of requests
+    request_queue_size = 128
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    n_workers: Optional[int] = None,
+    cache_size: int = 1024,
+) -> Tuple[CalcServer, ProcessPoolExecutor]:
+    """
+    Returns: the bound server and its pool, call serve_forever() on the
+             server and shut both down when done
+    """
+    pool = ProcessPoolExecutor(max_workers=n_workers)
+    server = CalcServer((host, port), make_handler(CoalescingCache(pool, cache_size)))
+    return server, pool
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the number of CPUs")
+    parser.add_argument("--cache-size", type=int, default=1024, help="responses kept in the cache")
+    args = parser.parse_args()
+
+    server, pool = serve(args.host, args.port, args.workers, args.cache_size)
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Tuple, Union
+
+import numpy as np
+import os
+
+
+# columns of an Arrow file, and of a (n_months, 2) .npy array in this order
+COLUMNS = ("stock", "cash")
+
+
+@dataclass(frozen=True)
+class HistoricalReturns:
+    # monthly simple returns, 0.01 = 1%, shape (n_months,), usually read-only memory maps
+    stock: np.ndarray
+    cash: np.ndarray
+    # months resampled together, which keeps the autocorrelation within a block
+    block_months: int = 12
+
+    @property
+    def n_months(self) -> int:
+        return len(self.stock)
+
+    def sample(self, n_paths: int, n_months: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Circular block bootstrap: each path strings together blocks of
+        block_months consecutive months from random starts, wrapping around the
+        end of the data. Stock and cash use the same months, so the dependence
+        between them is kept. The history is only read through one fancy-indexed
+        gather per asset into the output.
+        Returns: (stock_returns, cash_returns), gross monthly returns of shape (n_paths, n_months)
+        """
+        if self.n_months == 0:
+            raise ValueError("Historical returns are empty")
+        block_months = max(1, min(self.block_months, self.n_months))
+        n_blocks = -(-n_months // block_months)
+        starts = rng.integers(0, self.n_months, (n_paths, n_blocks, 1))
+        months = (starts + np.arange(block_months)).reshape(n_paths, -1)[:, :n_months]
+        months %= self.n_months
+
+        stock_returns = self.stock[months]
+        stock_returns += 1
+        cash_returns = self.cash[months]
+        cash_returns += 1
+        return stock_returns, cash_returns
+
+    def annual_means(self) -> Tuple[float, float]:
+        """
+        Returns: (stock, cash) mean monthly returns times 12, comparable to stock_mean / cash_mean
+        """
+        return 12 * float(np.mean(self.stock)), 12 * float(np.mean(self.cash))
+
+
+def load_historical_returns(path: Union[str, Path], block_months: int = 12) -> HistoricalReturns:
+    """
+    Memory-maps monthly returns from a .npy array of shape (n_months, 2) or an
+    Arrow IPC (Feather v2) file with float64 "stock" and "cash" columns,
+    written uncompressed so they can be read without a copy (compressed files
+    raise ValueError instead of being decompressed into memory). The mapping is
+    shared by every caller in the process until the file changes, and the
+    operating system keeps the pages in its cache between processes.
+    """
+    stat = os.stat(path)
+    stock, cash = _map_returns(str(Path(path).resolve()), stat.st_mtime_ns, stat.st_size)
+    return HistoricalReturns(stock=stock, cash=cash, block_months=block_months)
+
+
+@lru_cache(maxsize=8)
+def _map_returns(path: str, mtime_ns: int, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    if path.endswith(".npy"):
+        returns = np.load(path, mmap_mode="r")
+        if returns.ndim != 2 or returns.shape[1] != len(COLUMNS):
+            raise ValueError(f"{path} has shape {returns.shape}, expected (n_months, {len(COLUMNS)})")
+        return returns[:, 0], returns[:, 1]
+
+    # pyarrow is only needed for Arrow files
+    import pyarrow as pa
+
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+        source.seek(0)
+        mapped = source.read_buffer()
+    columns = []
+    for name in COLUMNS:
+        if name not in table.column_names:
+            raise ValueError(f"{path} has no {name!r} column")
+        chunks = table.column(name).chunks
+        try:
+            if len(chunks) != 1:
+                raise pa.ArrowInvalid(f"{len(chunks)} record batches")
+            # the array keeps the memory map open
+            columns.append(chunks[0].to_numpy(zero_copy_only=True))
+        except pa.ArrowInvalid as error:
+            raise ValueError(
+                f"Column {name!r} of {path} cannot be read without a copy ({error}), write it "
+                "as one uncompressed record batch of float64 without nulls") from error
+        # compressed batches (lz4 is the write_feather default) are decompressed onto the heap
+        data = chunks[0].buffers()[1]
+        if not mapped.address <= data.address < mapped.address + mapped.size:
+            raise ValueError(
+                f"{path} is compressed and cannot be memory-mapped, rewrite it with "
+                'pyarrow.feather.write_feather(table, path, compression="uncompressed")')
+    return columns[0], columns[1]
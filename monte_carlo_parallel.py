@@ -0,0 +1,119 @@
+from concurrent.futures import ProcessPoolExecutor
+from monte_carlo_sim import (
+    MonteCarloInput,
+    MonteCarloOutput,
+    block_seeds,
+    final_value_estimates,
+    simulate_block,
+    summarize_paths,
+)
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import ctypes
+import numpy as np
+import os
+
+
+# total, stock and cash paths
+N_OUTPUTS = 3
+
+# set in each worker by _attach_buffer
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_paths: Optional[np.ndarray] = None
+
+
+def _write_block(paths: np.ndarray, start: int, stock_paths: np.ndarray, cash_paths: np.ndarray) -> None:
+    stop = start + len(stock_paths)
+    np.add(stock_paths, cash_paths, out=paths[0, start:stop])
+    paths[1, start:stop] = stock_paths
+    paths[2, start:stop] = cash_paths
+
+
+def _attach_buffer(name: str, shape: Tuple[int, ...]) -> None:
+    global _worker_shm, _worker_paths
+    _worker_shm = shared_memory.SharedMemory(name=name)
+    _worker_paths = np.ndarray(shape, dtype=np.float64, buffer=_worker_shm.buf)
+
+
+def _run_block(task: Tuple[MonteCarloInput, np.random.SeedSequence, int, int]) -> None:
+    input, seed_sequence, start, n_paths = task
+    stock_paths, cash_paths = simulate_block(input, seed_sequence, n_paths)
+    _write_block(_worker_paths, start, stock_paths, cash_paths)
+
+
+class _SharedPaths:
+    """
+    Base object of the returned arrays. It owns the shared-memory block and
+    closes it once the last array using it is gone.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape: Tuple[int, ...]):
+        self._shm = shm
+        # take the address without keeping a buffer export open, close() refuses to run with one
+        address = ctypes.addressof(ctypes.c_char.from_buffer(shm.buf))
+        self.__array_interface__ = {
+            "data": (address, False),
+            "shape": shape,
+            "typestr": "<f8",
+            "version": 3,
+        }
+
+    def __del__(self):
+        self._shm.close()
+
+
+def run_monte_carlo_parallel(
+    input: MonteCarloInput,
+    seed: int = 42,
+    n_workers: Optional[int] = None,
+    block_size: int = 2048,
+) -> MonteCarloOutput:
+    """
+    run_monte_carlo split into blocks of block_size simulations across a process
+    pool. Every block draws from its own Generator spawned from SeedSequence(seed)
+    and workers write their paths straight into a shared-memory buffer that
+    backs the returned arrays, so the output is bit-identical for any n_workers.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    shape = (N_OUTPUTS, input.n_simulations, input.n_months)
+    starts = range(0, input.n_simulations, block_size)
+    tasks = [
+        (input, seed_sequence, start, min(block_size, input.n_simulations - start))
+        for start, seed_sequence in zip(starts, block_seeds(seed, len(starts)))
+    ]
+
+    if n_workers == 1 or len(tasks) <= 1:
+        paths = np.empty(shape)
+        for input, seed_sequence, start, n_paths in tasks:
+            _write_block(paths, start, *simulate_block(input, seed_sequence, n_paths))
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(n_workers, len(tasks)),
+                initializer=_attach_buffer,
+                initargs=(shm.name, shape),
+            ) as pool:
+                list(pool.map(_run_block, tasks))
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        # the mapping stays valid after unlink, it is closed once the arrays are gone
+        shm.unlink()
+        paths = np.asarray(_SharedPaths(shm, shape))
+
+    total_paths, stock_paths, cash_paths = paths
+    percentile_bands, representative_paths = summarize_paths(total_paths)
+    return MonteCarloOutput(
+        total_paths=total_paths,
+        stock_paths=stock_paths,
+        cash_paths=cash_paths,
+        final_values=total_paths[:, -1],
+        percentile_bands=percentile_bands,
+        representative_paths=representative_paths,
+        # every path is an independent draw, so any split into blocks gives valid standard errors
+        final_estimates=final_value_estimates(total_paths[:, -1], min(16, input.n_simulations)),
+        input=input,
+    )
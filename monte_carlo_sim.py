@@ -1,5 +1,29 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from historical_returns import HistoricalReturns
+from profiling import profiled, span
+from quantile_sketch import QuantileSketch
+from sim_utils import linear_recurrence
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
 import numpy as np
+import time
+import warnings
+
+
+# bump when run_monte_carlo returns different results for the same arguments, it
+# invalidates the entries stored by result_cache
+ENGINE_VERSION = 1
+
+# per-month percentiles returned for the fan chart, paired outside in around the median
+FAN_PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+# the sample paths returned are the ones whose final value ranks at these percentiles
+REPRESENTATIVE_PERCENTILES = (10, 50, 90)
+# how run_monte_carlo draws its returns, see run_monte_carlo
+SAMPLING_METHODS = ("pseudo", "antithetic", "sobol", "bootstrap")
+# percentiles of the final value reported with a standard error
+ESTIMATED_PERCENTILES = (10, 50, 90)
 
 
 @dataclass
@@ -27,73 +51,244 @@ class MonteCarloInput:
         return self.withdraw_year * 12
 
 
+@dataclass
+class Estimate:
+    value: float
+    standard_error: float
+
+
+@dataclass
+class PrecisionTarget:
+    # confidence interval width relative to the estimate, 0.02 = 2% of the value
+    relative_width: float = 0.02
+    confidence: float = 0.95
+    # final value percentiles that must meet the target, from ESTIMATED_PERCENTILES
+    percentiles: Tuple[float, ...] = (50, 10)
+    # seconds, stops after the batch that runs over it
+    time_budget: float = 10.0
+    batch_size: int = 512
+    # standard errors from fewer batches are too noisy to stop on
+    min_batches: int = 8
+    max_simulations: int = 50_000
+
+
+@dataclass
+class Convergence:
+    target: PrecisionTarget
+    n_batches: int
+    seconds: float
+    target_met: bool
+    # confidence interval width in dollars of each targeted percentile after the last batch
+    ci_widths: Dict[float, float]
+
+
 @dataclass
 class MonteCarloOutput:
     # shape: (n_simulations, n_months)
     total_paths: np.ndarray
     stock_paths: np.ndarray
     cash_paths: np.ndarray
-    median_path: np.ndarray
     final_values: np.ndarray
+    # shape: (len(FAN_PERCENTILES), n_months)
+    percentile_bands: np.ndarray
+    # shape: (len(REPRESENTATIVE_PERCENTILES), n_months)
+    representative_paths: np.ndarray
+    # final value "mean" and "p10" / "p50" / "p90", see final_value_estimates
+    final_estimates: Dict[str, Estimate]
     input: "MonteCarloInput"
+    # set by run_monte_carlo_adaptive
+    convergence: Optional[Convergence] = None
 
+    @property
+    def median_path(self) -> np.ndarray:
+        return self.percentile_path(50)
 
-def run_monte_carlo(input: MonteCarloInput) -> MonteCarloOutput:
-    np.random.seed(42)
+    def percentile_path(self, percentile: float) -> np.ndarray:
+        """
+        percentile: one of FAN_PERCENTILES
+        """
+        if percentile not in FAN_PERCENTILES:
+            raise ValueError(f"Percentile {percentile} is not one of {FAN_PERCENTILES}")
+        return self.percentile_bands[FAN_PERCENTILES.index(percentile)]
 
-    # Pre-withdrawal period
-    stock_returns_pre = 1 + np.random.normal(input.stock_mean / 12, input.stock_vol / np.sqrt(12),
-                                             (input.n_simulations, input.withdraw_month))
-    cash_returns_pre = 1 + np.random.normal(input.cash_mean / 12, input.cash_vol / np.sqrt(12),
-                                            (input.n_simulations, input.withdraw_month))
+    def final_percentile(self, percentile: float) -> float:
+        return float(self.percentile_path(percentile)[-1])
+
+
+@dataclass
+class MonteCarloSummary:
+    input: MonteCarloInput
+    n_paths: int
+    # shape: (n_months,)
+    sum_path: np.ndarray
+    min_path: np.ndarray
+    max_path: np.ndarray
+    # per-month sketch of total portfolio value
+    total_sketch: QuantileSketch
+    thresholds: Tuple[float, ...]
+    # shape: (len(thresholds), n_months), paths with a total below each threshold
+    below_threshold_counts: np.ndarray
+
+    @classmethod
+    def empty(
+        cls,
+        input: MonteCarloInput,
+        thresholds: Sequence[float] = (),
+        relative_accuracy: float = 0.01,
+    ) -> "MonteCarloSummary":
+        return cls(
+            input=input,
+            n_paths=0,
+            sum_path=np.zeros(input.n_months),
+            min_path=np.full(input.n_months, np.inf),
+            max_path=np.full(input.n_months, -np.inf),
+            total_sketch=QuantileSketch(input.n_months, relative_accuracy),
+            thresholds=tuple(thresholds),
+            below_threshold_counts=np.zeros((len(thresholds), input.n_months), dtype=np.int64),
+        )
+
+    def add(self, total_paths: np.ndarray) -> None:
+        """
+        total_paths: shape (n_paths, n_months)
+        """
+        self.n_paths += len(total_paths)
+        self.sum_path += total_paths.sum(axis=0)
+        np.minimum(self.min_path, total_paths.min(axis=0), out=self.min_path)
+        np.maximum(self.max_path, total_paths.max(axis=0), out=self.max_path)
+        self.total_sketch.add(total_paths)
+        for i, threshold in enumerate(self.thresholds):
+            self.below_threshold_counts[i] += (total_paths < threshold).sum(axis=0)
+
+    def merge(self, other: "MonteCarloSummary") -> None:
+        if self.thresholds != other.thresholds:
+            raise ValueError("Only summaries with the same thresholds can be merged")
+        self.n_paths += other.n_paths
+        self.sum_path += other.sum_path
+        np.minimum(self.min_path, other.min_path, out=self.min_path)
+        np.maximum(self.max_path, other.max_path, out=self.max_path)
+        self.total_sketch.merge(other.total_sketch)
+        self.below_threshold_counts += other.below_threshold_counts
+
+    @property
+    def mean_path(self) -> np.ndarray:
+        return self.sum_path / self.n_paths
+
+    @property
+    def median_path(self) -> np.ndarray:
+        return self.total_sketch.quantile(0.5)
+
+    def percentile_path(self, percentile: float) -> np.ndarray:
+        return self.total_sketch.quantile(percentile / 100)
+
+    def final_percentile(self, percentile: float) -> float:
+        return float(self.percentile_path(percentile)[-1])
+
+    @property
+    def probability_below_threshold(self) -> np.ndarray:
+        """
+        Returns: shape (len(thresholds), n_months)
+        """
+        return self.below_threshold_counts / self.n_paths
+
+    def final_value_histogram(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns: (bucket_values, counts) of final portfolio values
+        """
+        return self.total_sketch.histogram(-1)
+
+
+def compound_paths(start, returns: np.ndarray, contribution: float) -> np.ndarray:
+    """
+    Balances along axis 1 for x[0] = start * returns[0] + contribution and
+    x[k] = (x[k - 1] + contribution) * returns[k], without a per-month loop.
+    Returns: array shaped like returns
+    """
+    if returns.shape[1] == 0:
+        return np.zeros_like(returns)
+    if contribution == 0:
+        return np.asarray(start, dtype=float)[..., None] * np.cumprod(returns, axis=1)
+
+    increments = contribution * returns
+    increments[:, 0] = contribution
+    return linear_recurrence(start, returns, increments)
+
+
+def _withdraw(at_withdraw: np.ndarray, amount: float, returns_post: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns: (balances after the withdrawal, floored at 0, and the part of the
+    withdrawal the balance could not cover, grown over returns_post)
+    """
+    shortfall = np.maximum(0, amount - at_withdraw)
+    grown = np.zeros_like(shortfall)
+    if returns_post.shape[1] > 0:
+        # the floor rarely binds, only grow the paths where it does
+        short = shortfall > 0
+        grown[short] = shortfall[short] * np.prod(returns_post[short], axis=1)
+    return np.maximum(0, at_withdraw - amount), grown
 
-    stock_growth_pre = np.zeros_like(stock_returns_pre)
-    cash_growth_pre = np.zeros_like(cash_returns_pre)
 
-    stock_growth_pre[:, 0] = input.stock_start * \
-        stock_returns_pre[:, 0] + input.monthly_stock_contribution
-    cash_growth_pre[:, 0] = input.cash_start * \
-        cash_returns_pre[:, 0] + input.monthly_cash_contribution
+def simulate_paths(
+    input: MonteCarloInput,
+    n_paths: int,
+    normal: Callable[..., np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    normal: draws like np.random.normal(loc, scale, size), e.g. a Generator's normal
+    Returns: (stock_paths, cash_paths), each of shape (n_paths, n_months)
+    """
+    stock_paths, cash_paths, _ = _simulate_paths(input, n_paths, normal)
+    return stock_paths, cash_paths
 
-    for month in range(1, input.withdraw_month):
-        stock_growth_pre[:, month] = (
-            stock_growth_pre[:, month - 1] + input.monthly_stock_contribution) * stock_returns_pre[:, month]
-        cash_growth_pre[:, month] = (
-            cash_growth_pre[:, month - 1] + input.monthly_cash_contribution) * cash_returns_pre[:, month]
+
+def _simulate_paths(
+    input: MonteCarloInput,
+    n_paths: int,
+    normal: Optional[Callable[..., np.ndarray]],
+    returns: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    returns: (stock_returns, cash_returns) gross monthly returns of shape
+        (n_paths, n_months) to use instead of drawing them from normal
+    Returns: (stock_paths, cash_paths, shortfall), shortfall is how much lower the
+    final total would be if balances could go negative at the withdrawal
+    """
+    months_remaining = input.n_months - input.withdraw_month
+    if returns is None:
+        stock_returns_pre = 1 + normal(input.stock_mean / 12, input.stock_vol / np.sqrt(12),
+                                       (n_paths, input.withdraw_month))
+        cash_returns_pre = 1 + normal(input.cash_mean / 12, input.cash_vol / np.sqrt(12),
+                                      (n_paths, input.withdraw_month))
+        stock_returns_post = 1 + normal(input.stock_mean / 12, input.stock_vol / np.sqrt(12),
+                                        (n_paths, months_remaining))
+        cash_returns_post = 1 + normal(input.cash_mean / 12, input.cash_vol / np.sqrt(12),
+                                       (n_paths, months_remaining))
+    else:
+        stock_returns, cash_returns = returns
+        stock_returns_pre, stock_returns_post = np.split(stock_returns, [input.withdraw_month], axis=1)
+        cash_returns_pre, cash_returns_post = np.split(cash_returns, [input.withdraw_month], axis=1)
+
+    # Pre-withdrawal period
+    stock_growth_pre = compound_paths(
+        input.stock_start, stock_returns_pre, input.monthly_stock_contribution)
+    cash_growth_pre = compound_paths(
+        input.cash_start, cash_returns_pre, input.monthly_cash_contribution)
 
     # Withdrawal
     if input.withdraw_month > 0:
         stock_at_withdraw = stock_growth_pre[:, -1]
         cash_at_withdraw = cash_growth_pre[:, -1]
     else:
-        stock_at_withdraw = np.full(input.n_simulations, input.stock_start)
-        cash_at_withdraw = np.full(input.n_simulations, input.cash_start)
-
-    stock_after = np.maximum(0, stock_at_withdraw - input.withdraw_stock)
-    cash_after = np.maximum(0, cash_at_withdraw - input.withdraw_cash)
-
-    months_remaining = input.n_months - input.withdraw_month
+        stock_at_withdraw = np.full(n_paths, input.stock_start)
+        cash_at_withdraw = np.full(n_paths, input.cash_start)
 
     # Post-withdrawal period
-    stock_returns_post = 1 + np.random.normal(input.stock_mean / 12, input.stock_vol / np.sqrt(12),
-                                              (input.n_simulations, months_remaining))
-    cash_returns_post = 1 + np.random.normal(input.cash_mean / 12, input.cash_vol / np.sqrt(12),
-                                             (input.n_simulations, months_remaining))
-
-    stock_growth_post = np.zeros_like(stock_returns_post)
-    cash_growth_post = np.zeros_like(cash_returns_post)
-
-    if months_remaining > 0:
-        stock_growth_post[:, 0] = stock_after * \
-            stock_returns_post[:, 0] + input.monthly_stock_contribution
-        cash_growth_post[:, 0] = cash_after * \
-            cash_returns_post[:, 0] + input.monthly_cash_contribution
-
-        for month in range(1, months_remaining):
-            stock_growth_post[:, month] = (
-                stock_growth_post[:, month - 1] + input.monthly_stock_contribution) * stock_returns_post[:, month]
-            cash_growth_post[:, month] = (
-                cash_growth_post[:, month - 1] + input.monthly_cash_contribution) * cash_returns_post[:, month]
+    stock_after, stock_shortfall = _withdraw(stock_at_withdraw, input.withdraw_stock, stock_returns_post)
+    cash_after, cash_shortfall = _withdraw(cash_at_withdraw, input.withdraw_cash, cash_returns_post)
+
+    stock_growth_post = compound_paths(
+        stock_after, stock_returns_post, input.monthly_stock_contribution)
+    cash_growth_post = compound_paths(
+        cash_after, cash_returns_post, input.monthly_cash_contribution)
 
     # Combine results
     if input.withdraw_month > 0:
@@ -105,15 +300,390 @@ def run_monte_carlo(input: MonteCarloInput) -> MonteCarloOutput:
         stock_paths = stock_growth_post
         cash_paths = cash_growth_post
 
-    total_paths = stock_paths + cash_paths
-    median_path = np.median(total_paths, axis=0)
-    final_values = total_paths[:, -1]
+    return stock_paths, cash_paths, stock_shortfall + cash_shortfall
+
+
+def summarize_paths(total_paths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    All FAN_PERCENTILES of a month come from one partial sort of that month, and
+    the representative paths from one partial sort of the final values.
+    Returns: (percentile_bands, representative_paths), see MonteCarloOutput
+    """
+    percentile_bands = np.percentile(total_paths, FAN_PERCENTILES, axis=0)
+    ranks = np.rint(np.array(REPRESENTATIVE_PERCENTILES) / 100 * (len(total_paths) - 1)).astype(int)
+    by_final_value = np.argpartition(total_paths[:, -1], ranks)
+    return percentile_bands, total_paths[by_final_value[ranks]]
+
+
+def expected_final_value(input: MonteCarloInput) -> float:
+    """
+    Monthly returns are independent of the balance they apply to, so the expected
+    balances follow the same recursions with every return at its mean.
+    Returns: the expected final total if balances could go negative at the withdrawal
+    """
+    months_remaining = input.n_months - input.withdraw_month
+    total = 0.0
+    for start, mean, contribution, withdrawal in (
+        (input.stock_start, input.stock_mean, input.monthly_stock_contribution, input.withdraw_stock),
+        (input.cash_start, input.cash_mean, input.monthly_cash_contribution, input.withdraw_cash),
+    ):
+        returns = np.full((1, input.n_months), 1 + mean / 12)
+        balance = start
+        if input.withdraw_month > 0:
+            balance = compound_paths(start, returns[:, :input.withdraw_month], contribution)[0, -1]
+        if months_remaining > 0:
+            balance = compound_paths(
+                balance - withdrawal, returns[:, input.withdraw_month:], contribution)[0, -1]
+        total += balance
+    return total
+
+
+def replicate_sizes(n_paths: int, n_replicates: int) -> List[int]:
+    """
+    Returns: the sizes of n_replicates consecutive blocks of paths, split like np.array_split
+    """
+    size, extra = divmod(n_paths, n_replicates)
+    return [size + (i < extra) for i in range(n_replicates)]
+
+
+def antithetic(normal: Callable[..., np.ndarray], n_replicates: int) -> Callable[..., np.ndarray]:
+    """
+    Returns: a normal() drawing half of each replicate block and mirroring it
+    around loc, so every path is paired with one of opposite shocks
+    """
+    def draw(loc: float, scale: float, size: Tuple[int, int]) -> np.ndarray:
+        n_paths, n_months = size
+        blocks = []
+        for n in replicate_sizes(n_paths, n_replicates):
+            half = normal(loc, scale, ((n + 1) // 2, n_months))
+            blocks.append(np.concatenate([half, 2 * loc - half])[:n])
+        return np.concatenate(blocks)
+    return draw
+
+
+@lru_cache(maxsize=16)
+def _cosine_basis(n_months: int) -> np.ndarray:
+    """
+    Returns: orthonormal DCT-II basis of shape (n_months, n_months), row j has
+    the j-th lowest frequency and row 0 is constant
+    """
+    frequency = np.arange(n_months)[:, None]
+    month = np.arange(n_months)[None, :]
+    basis = np.sqrt(2 / n_months) * np.cos(np.pi * (month + 0.5) * frequency / n_months)
+    basis[:1] = 1 / np.sqrt(n_months)
+    return basis
+
+
+class SobolNormal:
+    """
+    normal() replacement for randomized quasi-Monte Carlo. The shocks of each
+    call are written in an orthonormal cosine basis, which keeps them
+    independent standard normals. The n_sobol_dims lowest frequencies, where
+    row 0 is the total shock that drives the final balance, come from scrambled
+    Sobol points through the inverse normal CDF, the rest from pseudo-random
+    draws. Each replicate block has its own scrambling, which makes the blocks
+    independent.
+
+    n_draws: how many times it will be called
+    """
+
+    def __init__(self, n_paths: int, n_draws: int, n_replicates: int, seed: int, n_sobol_dims: int = 4):
+        # scipy takes most of a second to import, only load it for this method
+        from scipy.special import ndtri
+        from scipy.stats import qmc
+
+        blocks = []
+        with warnings.catch_warnings():
+            # about blocks that are not a power of two
+            warnings.simplefilter("ignore", UserWarning)
+            for n, seed_sequence in zip(
+                    replicate_sizes(n_paths, n_replicates), block_seeds(seed, n_replicates)):
+                sobol = qmc.Sobol(n_draws * n_sobol_dims, seed=np.random.default_rng(seed_sequence))
+                blocks.append(sobol.random(n))
+        # column frequency * n_draws + draw, so the total shocks of every draw come first
+        self._sobol = ndtri(np.concatenate(blocks))
+        self._n_draws = n_draws
+        self._n_sobol_dims = n_sobol_dims
+        self._rng = np.random.default_rng(seed)
+        self._draw = 0
+
+    def __call__(self, loc: float, scale: float, size: Tuple[int, int]) -> np.ndarray:
+        n_paths, n_months = size
+        if n_paths != len(self._sobol) or self._draw >= self._n_draws:
+            raise ValueError(f"Draw of {size} does not fit the Sobol points")
+        low = self._sobol[:, self._draw::self._n_draws][:, :min(n_months, self._n_sobol_dims)]
+        self._draw += 1
+
+        shocks = self._rng.standard_normal(size)
+        if n_months > 0:
+            basis = _cosine_basis(n_months)[:low.shape[1]]
+            shocks += (low - shocks @ basis.T) @ basis
+        return loc + scale * shocks
+
+
+def final_value_estimates(
+    final_values: np.ndarray,
+    n_replicates: int,
+    control: Optional[np.ndarray] = None,
+    control_mean: Optional[float] = None,
+) -> Dict[str, Estimate]:
+    """
+    Point estimates use every path. Standard errors come from the spread of the
+    same statistic over n_replicates consecutive, independent blocks of paths.
+    With a control (known mean control_mean), the mean is the control variate
+    estimate, the percentiles are not adjusted.
+    Returns: {"mean", "p10", "p50", "p90"}
+    """
+    def standard_error(per_block: np.ndarray) -> float:
+        return float(np.std(per_block, ddof=1) / np.sqrt(n_replicates)) if n_replicates > 1 else np.nan
+
+    blocks = np.array_split(final_values, n_replicates)
+    mean = final_values.mean()
+    block_means = np.array([b.mean() for b in blocks])
+    if control is not None:
+        deviation = control - control_mean
+        variance = deviation.var()
+        beta = np.cov(final_values, deviation, bias=True)[0, 1] / variance if variance > 0 else 0.0
+        mean -= beta * deviation.mean()
+        block_means -= beta * np.array([b.mean() for b in np.array_split(deviation, n_replicates)])
+
+    estimates = {"mean": Estimate(float(mean), standard_error(block_means))}
+    pooled = np.percentile(final_values, ESTIMATED_PERCENTILES)
+    per_block = np.array([np.percentile(b, ESTIMATED_PERCENTILES) for b in blocks])
+    for i, percentile in enumerate(ESTIMATED_PERCENTILES):
+        estimates[f"p{percentile}"] = Estimate(float(pooled[i]), standard_error(per_block[:, i]))
+    return estimates
+
+
+def block_seeds(seed: int, n_blocks: int) -> List[np.random.SeedSequence]:
+    """
+    Returns: one independent SeedSequence per block of simulations, block i
+    always gets the same child however the blocks are scheduled
+    """
+    return np.random.SeedSequence(seed).spawn(n_blocks)
+
+
+def simulate_block(
+    input: MonteCarloInput,
+    seed_sequence: np.random.SeedSequence,
+    n_paths: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed_sequence)
+    return simulate_paths(input, n_paths, rng.normal)
+
+
+def _bootstrap_returns(
+    input: MonteCarloInput,
+    n_paths: int,
+    history: Optional[HistoricalReturns],
+    control_variate: bool,
+    rng: np.random.Generator,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns: (stock_returns, cash_returns) for _simulate_paths, resampled from history
+    """
+    if history is None:
+        raise ValueError("Bootstrap sampling needs historical returns, see load_historical_returns")
+    if control_variate:
+        # expected_final_value assumes independent months with mean stock_mean / cash_mean
+        raise ValueError("The control variate is not available with bootstrap sampling")
+    return history.sample(n_paths, input.n_months, rng)
+
+
+def _sampler(
+    sampling: str,
+    normal: Callable[..., np.ndarray],
+    n_paths: int,
+    n_replicates: int,
+    seed: int,
+) -> Callable[..., np.ndarray]:
+    """
+    normal: the pseudo-random draws to sample from
+    Returns: the normal() for _simulate_paths of n_paths paths
+    """
+    if sampling not in SAMPLING_METHODS:
+        raise ValueError(f"Unknown sampling method {sampling!r}, expected one of {SAMPLING_METHODS}")
+    if sampling == "antithetic":
+        return antithetic(normal, n_replicates)
+    if sampling == "sobol":
+        # _simulate_paths draws stock and cash returns before and after the withdrawal
+        return SobolNormal(n_paths, 4, n_replicates, seed)
+    return normal
+
+
+def _output(
+    input: MonteCarloInput,
+    stock_paths: np.ndarray,
+    cash_paths: np.ndarray,
+    shortfall: np.ndarray,
+    n_replicates: int,
+    control_variate: bool,
+) -> MonteCarloOutput:
+    with span("summarize_paths"):
+        total_paths = stock_paths + cash_paths
+        percentile_bands, representative_paths = summarize_paths(total_paths)
+        final_values = total_paths[:, -1]
+        if control_variate:
+            final_estimates = final_value_estimates(
+                final_values, n_replicates, final_values - shortfall, expected_final_value(input))
+        else:
+            final_estimates = final_value_estimates(final_values, n_replicates)
 
     return MonteCarloOutput(
         total_paths=total_paths,
         stock_paths=stock_paths,
         cash_paths=cash_paths,
-        median_path=median_path,
         final_values=final_values,
+        percentile_bands=percentile_bands,
+        representative_paths=representative_paths,
+        final_estimates=final_estimates,
         input=input,
     )
+
+
+@profiled("monte_carlo")
+def run_monte_carlo(
+    input: MonteCarloInput,
+    sampling: str = "pseudo",
+    control_variate: bool = False,
+    seed: int = 42,
+    n_replicates: int = 16,
+    history: Optional[HistoricalReturns] = None,
+) -> MonteCarloOutput:
+    """
+    sampling: one of SAMPLING_METHODS
+        "pseudo"      independent draws from np.random
+        "antithetic"  every path paired with one of mirrored shocks
+        "sobol"       scrambled Sobol points for the total shock of each period,
+                      see SobolNormal
+        "bootstrap"   blocks of months resampled from history, the means and
+                      volatilities of input are not used
+    control_variate: estimate the mean final value against the same paths with
+        balances allowed to go negative at the withdrawal, whose mean is known
+        (expected_final_value)
+    n_replicates: independent blocks of paths the standard errors are computed from
+    history: the returns to bootstrap from, see load_historical_returns
+    """
+    n_replicates = max(1, min(n_replicates, input.n_simulations))
+    returns = None
+    normal = None
+    if sampling == "bootstrap":
+        returns = _bootstrap_returns(
+            input, input.n_simulations, history, control_variate, np.random.default_rng(seed))
+    else:
+        np.random.seed(seed)
+        normal = _sampler(sampling, np.random.normal, input.n_simulations, n_replicates, seed)
+
+    with span("simulate_paths"):
+        stock_paths, cash_paths, shortfall = _simulate_paths(input, input.n_simulations, normal, returns)
+
+    return _output(input, stock_paths, cash_paths, shortfall, n_replicates, control_variate)
+
+
+@profiled("monte_carlo_adaptive")
+def run_monte_carlo_adaptive(
+    input: MonteCarloInput,
+    target: PrecisionTarget = PrecisionTarget(),
+    sampling: str = "pseudo",
+    control_variate: bool = False,
+    seed: int = 42,
+    history: Optional[HistoricalReturns] = None,
+) -> MonteCarloOutput:
+    """
+    run_monte_carlo that picks its own number of simulations. Paths are added in
+    batches of target.batch_size until the confidence intervals of the
+    target.percentiles of the final value are at most target.relative_width of
+    the estimate, target.time_budget runs out or target.max_simulations is
+    reached. Every batch has its own generator / Sobol scrambling, so standard
+    errors come from the spread of the batch percentiles, as in run_monte_carlo.
+    input.n_simulations is ignored.
+    Returns: output with input.n_simulations set to the number of paths used
+    """
+    unknown = set(target.percentiles) - set(ESTIMATED_PERCENTILES)
+    if unknown:
+        raise ValueError(f"Percentiles {sorted(unknown)} are not among {ESTIMATED_PERCENTILES}")
+    z = NormalDist().inv_cdf((1 + target.confidence) / 2)
+    batch_size = min(target.batch_size, target.max_simulations)
+    max_batches = target.max_simulations // batch_size
+    batch_input = replace(input, n_simulations=batch_size)
+    seed_sequence = np.random.SeedSequence(seed)
+
+    batches = []
+    batch_percentiles = []
+    started = time.perf_counter()
+    with span("simulate_batches"):
+        while True:
+            batch_seed = seed_sequence.spawn(1)[0]
+            if sampling == "bootstrap":
+                returns = _bootstrap_returns(
+                    batch_input, batch_size, history, control_variate, np.random.default_rng(batch_seed))
+                stock_paths, cash_paths, shortfall = _simulate_paths(batch_input, batch_size, None, returns)
+            else:
+                normal = _sampler(
+                    sampling,
+                    np.random.default_rng(batch_seed).normal,
+                    batch_size,
+                    1,
+                    int(batch_seed.generate_state(1)[0]),
+                )
+                stock_paths, cash_paths, shortfall = _simulate_paths(batch_input, batch_size, normal)
+            batches.append((stock_paths, cash_paths, shortfall))
+            batch_percentiles.append(
+                np.percentile(stock_paths[:, -1] + cash_paths[:, -1], target.percentiles))
+
+            n_batches = len(batches)
+            seconds = time.perf_counter() - started
+            if n_batches >= 2:
+                per_batch = np.array(batch_percentiles)
+                ci_widths = 2 * z * per_batch.std(axis=0, ddof=1) / np.sqrt(n_batches)
+                target_met = n_batches >= target.min_batches and bool(np.all(
+                    ci_widths <= target.relative_width * np.abs(per_batch.mean(axis=0))))
+            else:
+                ci_widths = np.full(len(target.percentiles), np.nan)
+                target_met = False
+            if target_met or seconds >= target.time_budget or n_batches >= max_batches:
+                break
+
+    stock_paths, cash_paths, shortfall = (np.concatenate(parts) for parts in zip(*batches))
+    output = _output(
+        replace(input, n_simulations=len(stock_paths)),
+        stock_paths,
+        cash_paths,
+        shortfall,
+        n_batches,
+        control_variate,
+    )
+    output.convergence = Convergence(
+        target=target,
+        n_batches=n_batches,
+        seconds=seconds,
+        target_met=target_met,
+        ci_widths=dict(zip(target.percentiles, ci_widths.tolist())),
+    )
+    return output
+
+
+@profiled("monte_carlo_summary")
+def run_monte_carlo_summary(
+    input: MonteCarloInput,
+    thresholds: Sequence[float] = (),
+    chunk_size: int = 2048,
+    seed: int = 42,
+    relative_accuracy: float = 0.01,
+) -> MonteCarloSummary:
+    """
+    Summary-only version of run_monte_carlo. Paths are generated chunk_size at a
+    time and folded into per-month statistics, so peak memory depends on
+    chunk_size and not on n_simulations. Each chunk draws from its own generator
+    (see block_seeds), so the paths match run_monte_carlo_parallel with
+    block_size=chunk_size but not run_monte_carlo.
+    """
+    summary = MonteCarloSummary.empty(input, thresholds, relative_accuracy)
+
+    starts = range(0, input.n_simulations, chunk_size)
+    for start, seed_sequence in zip(starts, block_seeds(seed, len(starts))):
+        n_paths = min(chunk_size, input.n_simulations - start)
+        stock_paths, cash_paths = simulate_block(input, seed_sequence, n_paths)
+        summary.add(stock_paths + cash_paths)
+
+    return summary
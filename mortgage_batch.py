@@ -0,0 +1,131 @@
+from dataclasses import dataclass, fields, replace
+from datetime import date
+from mortgage_calc import (
+    YearlyRateType,
+    mortgage_schedule,
+    ownership_costs,
+    periodic_interest_rate,
+)
+from mortgage_input import MortgageInput
+from rental_sim import rental_schedule
+from sim_utils import month_dates
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+# these decide the shape of the schedule and must be the same for every scenario
+SCALAR_FIELDS = (
+    "loan_term",
+    "is_arm",
+    "arm_rates",
+    "purchase_date",
+    "should_add_closing_to_loan",
+)
+
+RENTAL_COLUMNS = ("rental_cost", "net_worth_if_renting")
+
+
+@dataclass
+class MortgageBatchOutput:
+    ds: List[date]
+    # {column: array of shape (n_scenarios, len(ds))}
+    columns: dict[str, np.ndarray]
+    input: MortgageInput
+
+    @property
+    def n_scenarios(self) -> int:
+        return len(next(iter(self.columns.values())))
+
+    @property
+    def final_net_worth_gap(self) -> np.ndarray:
+        """
+        Returns: buy minus rent net worth at the last kept month, per scenario
+        """
+        return (self.columns["net_worth_after_sale"][:, -1]
+                - self.columns["net_worth_if_renting"][:, -1])
+
+
+def scenario_grid(input: MortgageInput, **axes: Sequence[float]) -> MortgageInput:
+    """
+    Cartesian product of the given field values, e.g.
+    scenario_grid(input, mortgage_interest_rate=rates, property_appreciation=apps).
+    Returns: a batch input with one flattened array per axis, the first axis varying slowest
+    """
+    mesh = np.meshgrid(*[np.asarray(v, dtype=float) for v in axes.values()], indexing="ij")
+    return replace(input, **{field: values.ravel() for field, values in zip(axes, mesh)})
+
+
+def n_scenarios(input: MortgageInput) -> int:
+    sizes = {np.size(getattr(input, f.name)) for f in fields(input)
+             if isinstance(getattr(input, f.name), np.ndarray)}
+    if len(sizes) > 1:
+        raise ValueError(f"Batch fields must all have the same length, got {sorted(sizes)}")
+    return sizes.pop() if sizes else 1
+
+
+def scenario_slice(input: MortgageInput, start: int, stop: int) -> MortgageInput:
+    return replace(input, **{
+        f.name: getattr(input, f.name)[start:stop] for f in fields(input)
+        if isinstance(getattr(input, f.name), np.ndarray)
+    })
+
+
+def run_mortgage_batch(
+    input: MortgageInput,
+    simulation_length_months: int = 30*12,
+    columns: Sequence[str] = ("net_worth_after_sale", "net_worth_if_renting"),
+    months: Optional[Sequence[int]] = None,
+    chunk_size: int = 2048,
+) -> MortgageBatchOutput:
+    """
+    Batch version of run_mortgage_calc. Any field of input outside SCALAR_FIELDS
+    may be an array with one value per scenario (see scenario_grid). Scenarios
+    are evaluated in vectorized chunks of chunk_size and only the requested
+    columns and months are kept.
+    Returns: MortgageBatchOutput with (n_scenarios, len(months)) arrays
+    """
+    for field in SCALAR_FIELDS:
+        if isinstance(getattr(input, field), np.ndarray):
+            raise ValueError(f"{field} must be the same for every scenario")
+
+    total = n_scenarios(input)
+    month_index = (np.arange(simulation_length_months) if months is None
+                   else np.arange(simulation_length_months)[list(months)])
+    out = {col: np.empty((total, len(month_index))) for col in columns}
+
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        chunk = scenario_slice(input, start, stop)
+        pir = periodic_interest_rate(
+            mortgage_interest_rate=chunk.mortgage_interest_rate, interest_rate_type=YearlyRateType.APR)
+        monthly_operating_expenses, monthly_mortgage, down_plus_closing = ownership_costs(
+            input=chunk,
+            periodic_interest_rate=pir,
+        )
+        schedule = mortgage_schedule(
+            monthly_operating_expenses=monthly_operating_expenses,
+            down_plus_closing=down_plus_closing,
+            periodic_mortgage_payment=monthly_mortgage,
+            input=chunk,
+            periodic_interest_rate=pir,
+            simulation_length_months=simulation_length_months,
+            columns=[*columns, "interest_payment"],
+        )
+        if "total_interest_paid" in columns:
+            schedule["total_interest_paid"] = np.cumsum(schedule["interest_payment"], axis=-1)
+        if any(col in RENTAL_COLUMNS for col in columns):
+            rental = rental_schedule(simulation_length_months, chunk)
+            schedule.update({col: rental[col] for col in RENTAL_COLUMNS})
+
+        for col in columns:
+            out[col][start:stop] = np.broadcast_to(
+                schedule[col][..., month_index], (stop - start, len(month_index)))
+
+    all_dates = month_dates(input.purchase_date, simulation_length_months)
+    return MortgageBatchOutput(
+        ds=[all_dates[i] for i in month_index],
+        columns=out,
+        input=input,
+    )
+
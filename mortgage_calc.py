@@ -1,16 +1,16 @@
+from amortization import unit_schedule
 from dataclasses import dataclass
 from datetime import date
-from dateutil.relativedelta import relativedelta
 from enum import Enum
 from mortgage_input import ARMRates, MortgageInput
+from profiling import profiled
 from rental_sim import calculate_monthly_rental_cost
-from typing import Tuple, List, Optional
+from simulation_result import SimulationResult
+from sim_utils import linear_recurrence, month_dates, per_month
+from typing import Tuple, List, Optional, Sequence
 
+import numpy as np
 import numpy_financial as npf
-import pandas as pd
-
-
-pd.set_option("float_format", "{:,}".format)
 
 
 @dataclass
@@ -33,12 +33,29 @@ class MortgageData:
     monthly_cost_ownership: float
 
 
+# bump when run_mortgage_calc returns different results for the same input, it
+# invalidates the entries stored by result_cache
+ENGINE_VERSION = 1
+
+SIMULATION_LENGTH_MONTHS = 30*12
+
+# everything except the rent inputs, see rental_sim.RENTAL_INPUT_FIELDS
+OWNERSHIP_INPUT_FIELDS = tuple(
+    f for f in MortgageInput.__dataclass_fields__
+    if f not in ("monthly_rent", "rental_increase_pct")
+)
+
+# MortgageData fields that are not rounded to the cent
+UNROUNDED_COLUMNS = ("roi_net_worth", "roi", "ds")
+
+
 class YearlyRateType(Enum):
     APY = 1
     APR = 2
 
 
 # yearly interest rate per month
+@profiled("ownership_costs")
 def ownership_costs(
     input: MortgageInput,
     periodic_interest_rate: float,
@@ -56,9 +73,13 @@ def ownership_costs(
     else:
         mortgage = input.home_price - input.downpayment
 
-    periodic_mortgage_payment = -1*npf.pmt(
-        periodic_interest_rate, payment_periods, mortgage
-    )
+    if np.ndim(periodic_interest_rate) == 0 and np.ndim(payment_periods) == 0:
+        # the payment scales with the loan, only the rate and term need the annuity formula
+        periodic_mortgage_payment = mortgage * unit_schedule(periodic_interest_rate, payment_periods).payment
+    else:
+        periodic_mortgage_payment = -1*npf.pmt(
+            periodic_interest_rate, payment_periods, mortgage
+        )
 
     monthly_property_tax = input.home_price * (input.property_tax_rate/12)
 
@@ -71,6 +92,9 @@ def ownership_costs(
         + monthly_property_tax
     )
 
+    if np.ndim(monthly_operating_expenses) > 0:
+        # batch inputs (see mortgage_batch) keep one value per scenario
+        return monthly_operating_expenses, periodic_mortgage_payment, down_plus_closing
     return float(monthly_operating_expenses), float(periodic_mortgage_payment), down_plus_closing
 
 
@@ -106,115 +130,292 @@ def adjust_arm_payment(
     return current_rate, new_payment, last_rate_adjustment_month
 
 
-def calculate_monthly_cost_and_loan_balance(
+def arm_adjustment_schedule(
+    arm_input: ARMRates,
+    total_term_months: int,
+    simulation_length_months: int,
+) -> List[Tuple[int, float]]:
+    """
+    Months in which adjust_arm_payment raises the rate, replaying its cap rules
+    without walking every month.
+    Returns: [(month, cap)]
+    """
+    schedule = []
+    end = min(total_term_months, simulation_length_months)
+    last_rate_adjustment_month = -1
+    row = arm_input.fixed_period_months
+    while row < end:
+        if row == arm_input.fixed_period_months:
+            cap = arm_input.monthly_initial_cap
+        elif (row - last_rate_adjustment_month) >= 12:
+            cap = arm_input.monthly_annual_cap
+        else:
+            cap = 0
+
+        if cap > 0:
+            schedule.append((row, cap))
+            last_rate_adjustment_month = row
+            row += 12
+        elif row == arm_input.fixed_period_months:
+            row += 1
+        elif arm_input.monthly_annual_cap <= 0:
+            break
+        else:
+            row = max(row + 1, last_rate_adjustment_month + 12)
+
+    return schedule
+
+
+def loan_segments(
+    input: MortgageInput,
+    periodic_interest_rate: float,
+    simulation_length_months: int,
+    arm_reset_rates: Optional[Sequence] = None,
+) -> List[Tuple[int, float, bool]]:
+    """
+    Stretches of the loan with one rate and payment, up to the end of the term
+    or the simulation. Fixed loans have one, ARMs start another at the end of
+    the fixed period and at each rate adjustment (see loan_cash_flows for
+    arm_reset_rates).
+    Returns: [(start month, periodic rate, recompute the payment from the remaining balance)]
+    """
+    total_term_months = input.loan_term * 12
+    term_end = min(total_term_months, simulation_length_months)
+    segments = [(0, periodic_interest_rate, False)]
+    if input.is_arm and input.arm_rates:
+        arm_input = input.arm_rates
+        max_rate = periodic_interest_rate + arm_input.monthly_lifetime_cap
+        resets = [(arm_input.fixed_period_months, periodic_interest_rate)]
+        current_rate = periodic_interest_rate
+        for i, (month, cap) in enumerate(
+                arm_adjustment_schedule(arm_input, total_term_months, simulation_length_months)):
+            if arm_reset_rates is None:
+                current_rate = np.minimum(current_rate + cap, max_rate)
+            else:
+                current_rate = arm_reset_rates[i]
+            resets.append((month, current_rate))
+        for month, rate in resets:
+            if month >= term_end:
+                continue
+            if month == segments[-1][0]:
+                segments.pop()
+            segments.append((month, rate, True))
+    return segments
+
+
+@profiled("loan_cash_flows")
+def loan_cash_flows(
     monthly_operating_expenses: float,
-    down_plus_closing: float,
     periodic_mortgage_payment: float,
     input: MortgageInput,
     periodic_interest_rate: float,
     simulation_length_months: int,
-    rental_money: float = 0.0,
     starting_loan_balance: Optional[float] = None,
-) -> List[MortgageData]:
+    arm_reset_rates: Optional[Sequence] = None,
+) -> dict[str, np.ndarray]:
+    """
+    The loan side of mortgage_schedule, unrounded. The loan is amortized in
+    closed form between payment resets (the start of the ARM adjustable period
+    and each rate adjustment), by scaling the cached unit schedule of the
+    segment's rate and remaining term when every loan shares that rate.
+
+    arm_reset_rates replaces the periodic rate set at each month of
+    arm_adjustment_schedule, which otherwise goes up by the full cap. Array
+    entries of shape (n_paths,) give one loan per rate path.
+    Returns: {"balance": balance at the start of every month plus the final one,
+              "payment", "interest_payment", "principal_paid",
+              "monthly_cost_ownership"}
+    """
+    n = simulation_length_months
     total_term_months = input.loan_term * 12
-    loan_balance = starting_loan_balance if starting_loan_balance is not None else input.home_price - input.downpayment
-    projected_home_value = input.home_price
-    data = []
+    term_end = min(total_term_months, n)
+    months = np.arange(n)
+    loan_balance = (starting_loan_balance if starting_loan_balance is not None
+                    else input.home_price - input.downpayment)
+    segments = loan_segments(input, periodic_interest_rate, n, arm_reset_rates)
+
+    lead = np.broadcast_shapes(
+        np.shape(loan_balance),
+        np.shape(periodic_interest_rate),
+        np.shape(periodic_mortgage_payment),
+        *(np.shape(rate) for _, rate, _ in segments),
+    )
+    rates = np.zeros(lead + (n,))
+    payments = np.zeros(lead + (n,))
+    balances = np.empty(lead + (n + 1,))
+    balances[..., 0] = loan_balance
+
+    payment = periodic_mortgage_payment
+    for i, (start, rate, recompute) in enumerate(segments):
+        stop = segments[i + 1][0] if i + 1 < len(segments) else term_end
+        schedule = unit_schedule(rate, total_term_months - start) if np.ndim(rate) == 0 else None
+        if recompute and schedule is not None:
+            payment = balances[..., start] * schedule.payment
+        elif recompute:
+            payment = -1 * npf.pmt(rate, total_term_months - start, balances[..., start])
+        rates[..., start:stop] = per_month(rate)
+        payments[..., start:stop] = per_month(payment)
+        if schedule is not None:
+            balances[..., start + 1:stop + 1] = schedule.balances(balances[..., start], payment, stop - start)
+        else:
+            balances[..., start + 1:stop + 1] = linear_recurrence(
+                balances[..., start],
+                1 + rates[..., start:stop],
+                -payments[..., start:stop],
+            )
+    balances[..., term_end + 1:] = balances[..., term_end:term_end + 1]
 
-    cash_reserve = input.starting_cash - down_plus_closing
+    interest_payment = balances[..., :-1] * rates
+    principal_paid = payments - interest_payment
 
-    current_rate = periodic_interest_rate
-    current_payment = periodic_mortgage_payment
-    last_rate_adjustment_month = -1
-    for row in range(simulation_length_months):
-        months_remaining = total_term_months - row
-
-        if input.is_arm and input.arm_rates and row >= input.arm_rates.fixed_period_months:
-            current_rate, current_payment, last_rate_adjustment_month = adjust_arm_payment(
-                row,
-                loan_balance,
-                months_remaining,
-                current_rate,
-                periodic_interest_rate,
-                input.arm_rates,
-                last_rate_adjustment_month,
-            )
+    carrying_costs = (
+        input.monthly_pmi
+        + input.monthly_hoa
+        + input.monthly_insurance
+        + input.monthly_maintenance_fund
+    )
+    monthly_property_tax = input.home_price * (input.property_tax_rate / 12)
+    in_term = months < total_term_months
+    if input.is_arm and input.arm_rates:
+        adjustable = months >= input.arm_rates.fixed_period_months
+        in_term_costs = np.where(
+            adjustable,
+            per_month(carrying_costs) + payments + per_month(monthly_property_tax),
+            per_month(monthly_operating_expenses),
+        )
+    else:
+        in_term_costs = per_month(monthly_operating_expenses)
+    monthly_cost_ownership = np.where(
+        in_term,
+        in_term_costs,
+        per_month(carrying_costs + monthly_property_tax),
+    )
 
-            monthly_property_tax = input.home_price * \
-                (input.property_tax_rate / 12)
-            monthly_operating_expenses = (
-                input.monthly_pmi
-                + input.monthly_hoa
-                + input.monthly_insurance
-                + input.monthly_maintenance_fund
-                + current_payment
-                + monthly_property_tax
-            )
+    return {
+        "balance": balances,
+        "payment": payments,
+        "interest_payment": interest_payment,
+        "principal_paid": principal_paid,
+        "monthly_cost_ownership": monthly_cost_ownership,
+    }
 
-        # Determine monthly payment breakdown
-        if row < total_term_months:
-            interest_payment = loan_balance * current_rate
-            principal_paid = current_payment - interest_payment
-        else:
-            principal_paid = 0
-            interest_payment = 0
-            monthly_operating_expenses = (
-                input.monthly_pmi
-                + input.monthly_hoa
-                + input.monthly_insurance
-                + input.monthly_maintenance_fund
-                + (input.home_price * input.property_tax_rate / 12)
-            )
 
-        ds = input.purchase_date + relativedelta(months=row + 1)
-        projected_home_value = input.home_price * \
-            (1 + input.property_appreciation) ** (row / 12)
-
-        # Capital gains logic
-        gross_gain = projected_home_value - input.home_price - \
-            projected_home_value * input.realtor_fee_at_sale
-        if gross_gain > 0:
-            capital_gains = gross_gain * input.capital_gains_tax
-            net_profit_at_sale = (
-                projected_home_value *
-                (1 - input.realtor_fee_at_sale) - loan_balance - capital_gains
-            )
-        else:
-            net_profit_at_sale = projected_home_value * \
-                (1 - input.realtor_fee_at_sale) - loan_balance
-
-        net_worth_after_sale = net_profit_at_sale + cash_reserve
-        net_profit = net_profit_at_sale
-        roi = net_profit / down_plus_closing
-        roi_net_worth = (net_profit + cash_reserve) / down_plus_closing
-        monthly_income = input.monthly_income * \
-            (1 + input.yearly_increase) ** (row / 12)
-        monthly_savings = monthly_income - monthly_operating_expenses
-        cash_reserve = (
-            cash_reserve * (1 + input.stock_interest_rate / 12)
-            + monthly_savings
-            + rental_money
-            - monthly_operating_expenses
-        )
+def net_proceeds_from_sale(
+    input: MortgageInput,
+    projected_home_value: np.ndarray,
+    loan_balance: np.ndarray,
+) -> np.ndarray:
+    # Capital gains logic
+    gross_gain = projected_home_value - per_month(input.home_price) - \
+        projected_home_value * per_month(input.realtor_fee_at_sale)
+    capital_gains = np.where(
+        gross_gain > 0, gross_gain * per_month(input.capital_gains_tax), 0.0)
+    return (
+        projected_home_value * per_month(1 - input.realtor_fee_at_sale)
+        - loan_balance
+        - capital_gains
+    )
 
-        loan_balance -= principal_paid
 
-        data.append(MortgageData(
-            round(principal_paid, 2),
-            round(interest_payment, 2),
-            round(projected_home_value, 2),
-            round(net_profit_at_sale, 2),
-            round(loan_balance, 2),
-            round(cash_reserve, 2),
-            round(net_worth_after_sale, 2),
-            roi_net_worth,
-            roi,
-            round(net_profit, 2),
-            ds,
-            round(monthly_operating_expenses, 2),
-        ))
+@profiled("mortgage_schedule")
+def mortgage_schedule(
+    monthly_operating_expenses: float,
+    down_plus_closing: float,
+    periodic_mortgage_payment: float,
+    input: MortgageInput,
+    periodic_interest_rate: float,
+    simulation_length_months: int,
+    rental_money: float = 0.0,
+    starting_loan_balance: Optional[float] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> dict[str, np.ndarray]:
+    """
+    Array version of calculate_monthly_cost_and_loan_balance, every month is
+    computed at once (see loan_cash_flows for the loan itself).
+    Returns: {MortgageData field: column}, limited to columns when given
+    """
+    n = simulation_length_months
+    months = np.arange(n)
+    loan = loan_cash_flows(
+        monthly_operating_expenses=monthly_operating_expenses,
+        periodic_mortgage_payment=periodic_mortgage_payment,
+        input=input,
+        periodic_interest_rate=periodic_interest_rate,
+        simulation_length_months=n,
+        starting_loan_balance=starting_loan_balance,
+    )
+    balances = loan["balance"]
+    monthly_cost_ownership = loan["monthly_cost_ownership"]
+
+    projected_home_value = per_month(input.home_price) * \
+        per_month(1 + input.property_appreciation) ** (months / 12)
+
+    net_profit_at_sale = net_proceeds_from_sale(input, projected_home_value, balances[..., :-1])
+
+    monthly_income = per_month(input.monthly_income) * \
+        per_month(1 + input.yearly_increase) ** (months / 12)
+    monthly_savings = monthly_income - monthly_cost_ownership
+    starting_cash_reserve = np.asarray(input.starting_cash - down_plus_closing, dtype=float)
+    cash_reserve = linear_recurrence(
+        starting_cash_reserve,
+        per_month(1 + input.stock_interest_rate / 12),
+        monthly_savings + per_month(rental_money) - monthly_cost_ownership,
+    )
+    cash_reserve_before = np.concatenate([
+        np.broadcast_to(per_month(starting_cash_reserve), cash_reserve.shape[:-1] + (1,)),
+        cash_reserve[..., :-1],
+    ], axis=-1)
+
+    net_worth_after_sale = net_profit_at_sale + cash_reserve_before
+    roi = net_profit_at_sale / per_month(down_plus_closing)
+    roi_net_worth = net_worth_after_sale / per_month(down_plus_closing)
+
+    schedule = {
+        "principle_paid": loan["principal_paid"],
+        "interest_payment": loan["interest_payment"],
+        "projected_home_value": projected_home_value,
+        "net_profit_from_home_sale": net_profit_at_sale,
+        "loan_balance": balances[..., 1:],
+        "cash_reserve": cash_reserve,
+        "net_worth_after_sale": net_worth_after_sale,
+        "roi_net_worth": roi_net_worth,
+        "roi": roi,
+        "net_profit": net_profit_at_sale,
+        "ds": list(month_dates(input.purchase_date, n)),
+        "monthly_cost_ownership": monthly_cost_ownership,
+    }
+    return {
+        name: value if name in UNROUNDED_COLUMNS else np.round(value, 2)
+        for name, value in schedule.items()
+        if columns is None or name in columns
+    }
+
 
-    return data
+def calculate_monthly_cost_and_loan_balance(
+    monthly_operating_expenses: float,
+    down_plus_closing: float,
+    periodic_mortgage_payment: float,
+    input: MortgageInput,
+    periodic_interest_rate: float,
+    simulation_length_months: int,
+    rental_money: float = 0.0,
+    starting_loan_balance: Optional[float] = None,
+) -> List[MortgageData]:
+    schedule = mortgage_schedule(
+        monthly_operating_expenses=monthly_operating_expenses,
+        down_plus_closing=down_plus_closing,
+        periodic_mortgage_payment=periodic_mortgage_payment,
+        input=input,
+        periodic_interest_rate=periodic_interest_rate,
+        simulation_length_months=simulation_length_months,
+        rental_money=rental_money,
+        starting_loan_balance=starting_loan_balance,
+    )
+    columns = [
+        schedule[field] if field == "ds" else schedule[field].tolist()
+        for field in MortgageData.__dataclass_fields__
+    ]
+    return [MortgageData(*row) for row in zip(*columns)]
 
 
 def periodic_interest_rate(mortgage_interest_rate: float, interest_rate_type: YearlyRateType) -> float:
@@ -224,7 +425,11 @@ def periodic_interest_rate(mortgage_interest_rate: float, interest_rate_type: Ye
             )
 
 
-def run_mortgage_calc(input: MortgageInput) -> pd.DataFrame:
+@profiled("ownership")
+def run_ownership_calc(input: MortgageInput) -> SimulationResult:
+    """
+    Ownership half of run_mortgage_calc, reads only OWNERSHIP_INPUT_FIELDS.
+    """
     pir = periodic_interest_rate(
         mortgage_interest_rate=input.mortgage_interest_rate, interest_rate_type=YearlyRateType.APR)
 
@@ -233,26 +438,36 @@ def run_mortgage_calc(input: MortgageInput) -> pd.DataFrame:
         periodic_interest_rate=pir,
     )
 
-    mortgage_data = calculate_monthly_cost_and_loan_balance(
+    schedule = mortgage_schedule(
         monthly_operating_expenses=monthly_operating_expenses,
         down_plus_closing=down_plus_closing,
         periodic_mortgage_payment=monthly_mortgage,
         input=input,
         periodic_interest_rate=pir,
-        simulation_length_months=30*12,
+        simulation_length_months=SIMULATION_LENGTH_MONTHS,
     )
 
-    df_rent = calculate_monthly_rental_cost(
-        simulation_length_months=30*12, input=input)
+    schedule["total_interest_paid"] = np.cumsum(schedule["interest_payment"])
+    return SimulationResult(schedule.pop("ds"), schedule)
 
-    df_own = pd.DataFrame([vars(s) for s in mortgage_data])
-    df_own["total_interest_paid"] = df_own["interest_payment"].cumsum()
-    df = pd.merge(df_own, df_rent, on="ds", how="left")
 
-    return df
+@profiled("combine")
+def combine_ownership_and_rental(own: SimulationResult, rent: SimulationResult) -> SimulationResult:
+    return own.join(rent)
 
 
-def run_mortgage_simulation(
+def run_mortgage_calc(input: MortgageInput) -> SimulationResult:
+    """
+    Returns: ownership and rental columns over the simulated months, call
+             to_frame() on it for a DataFrame
+    """
+    own = run_ownership_calc(input)
+    rent = calculate_monthly_rental_cost(
+        simulation_length_months=SIMULATION_LENGTH_MONTHS, input=input)
+    return combine_ownership_and_rental(own, rent)
+
+
+def build_mortgage_inputs(
     home_price: float,
     downpayment: float,
     loan_options: dict[str, dict[str, str]],
@@ -272,11 +487,11 @@ def run_mortgage_simulation(
     monthly_hoa: float,
     monthly_insurance: float,
     monthly_maintenance_fund: float,
-) -> dict[str, pd.DataFrame]:
-    dfs = {}
+) -> dict[str, MortgageInput]:
+    inputs = {}
     for label, opt in loan_options.items():
         is_arm = (label == "5/1 ARM")
-        input = MortgageInput(
+        inputs[label] = MortgageInput(
             home_price=home_price,
             downpayment=downpayment,
             mortgage_interest_rate=float(opt["rate"]),
@@ -300,7 +515,59 @@ def run_mortgage_simulation(
             arm_rates=ARMRates() if is_arm else None,
             is_arm=is_arm,
         )
-        df_option = run_mortgage_calc(input)
-        dfs[label] = df_option
 
-    return dfs
+    return inputs
+
+
+def run_mortgage_simulation(
+    home_price: float,
+    downpayment: float,
+    loan_options: dict[str, dict[str, str]],
+    property_appreciation: float,
+    starting_cash: float,
+    realtor_fee_at_sale: float,
+    capital_gains_tax: float,
+    monthly_rent: float,
+    rental_increase_pct: float,
+    stock_interest_rate: float,
+    monthly_income_saved: float,
+    yearly_increase: float,
+    closing_cost_percentage: float,
+    property_tax_rate: float,
+    should_add_closing_to_loan: bool,
+    monthly_pmi: float,
+    monthly_hoa: float,
+    monthly_insurance: float,
+    monthly_maintenance_fund: float,
+) -> dict[str, SimulationResult]:
+    inputs = build_mortgage_inputs(
+        home_price=home_price,
+        downpayment=downpayment,
+        loan_options=loan_options,
+        property_appreciation=property_appreciation,
+        starting_cash=starting_cash,
+        realtor_fee_at_sale=realtor_fee_at_sale,
+        capital_gains_tax=capital_gains_tax,
+        monthly_rent=monthly_rent,
+        rental_increase_pct=rental_increase_pct,
+        stock_interest_rate=stock_interest_rate,
+        monthly_income_saved=monthly_income_saved,
+        yearly_increase=yearly_increase,
+        closing_cost_percentage=closing_cost_percentage,
+        property_tax_rate=property_tax_rate,
+        should_add_closing_to_loan=should_add_closing_to_loan,
+        monthly_pmi=monthly_pmi,
+        monthly_hoa=monthly_hoa,
+        monthly_insurance=monthly_insurance,
+        monthly_maintenance_fund=monthly_maintenance_fund,
+    )
+    if not inputs:
+        return {}
+
+    # the rent path only reads fields shared by every loan option, compute it once
+    rent = calculate_monthly_rental_cost(
+        simulation_length_months=SIMULATION_LENGTH_MONTHS, input=next(iter(inputs.values())))
+    return {
+        label: combine_ownership_and_rental(run_ownership_calc(input), rent)
+        for label, input in inputs.items()
+    }
@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+from mortgage_calc import (
+    OWNERSHIP_INPUT_FIELDS,
+    SIMULATION_LENGTH_MONTHS,
+    build_mortgage_inputs,
+    combine_ownership_and_rental,
+    run_ownership_calc,
+)
+from mortgage_input import MortgageInput
+from profiling import span
+from rental_sim import RENTAL_INPUT_FIELDS, calculate_monthly_rental_cost
+from simulation_result import SimulationResult
+from typing import Any, List, Optional, Tuple
+
+
+@dataclass
+class _CachedStage:
+    # values of the input fields the stage read when it was computed
+    key: Tuple[Any, ...]
+    result: SimulationResult
+
+
+def _field_key(input: MortgageInput, fields: Tuple[str, ...]) -> Tuple[Any, ...]:
+    return tuple(getattr(input, f) for f in fields)
+
+
+class IncrementalMortgageSimulation:
+    """
+    run_mortgage_simulation that keeps the result of every stage and only
+    recomputes the stages whose input fields changed since the last run:
+    - rental: rental columns, shared by all loan options (RENTAL_INPUT_FIELDS)
+    - ownership per loan option: schedule columns (OWNERSHIP_INPUT_FIELDS)
+    - combine per loan option: when either of its two stages was recomputed
+
+    Returned results are cached and shared between runs, their columns are read-only.
+    """
+
+    def __init__(self):
+        self._rental: Optional[_CachedStage] = None
+        self._ownership: dict[str, _CachedStage] = {}
+        self._combined: dict[str, SimulationResult] = {}
+        # stages recomputed by the last run, e.g. ["rental", "combine:30-year fixed"]
+        self.recomputed: List[str] = []
+
+    def run(self, **simulation_kwargs) -> dict[str, SimulationResult]:
+        """
+        simulation_kwargs: the arguments of run_mortgage_simulation
+        """
+        inputs = build_mortgage_inputs(**simulation_kwargs)
+        self.recomputed = []
+        if not inputs:
+            return {}
+
+        rental_input = next(iter(inputs.values()))
+        rental_key = _field_key(rental_input, RENTAL_INPUT_FIELDS)
+        rental_changed = self._rental is None or self._rental.key != rental_key
+        if rental_changed:
+            with span("stage:rental"):
+                self._rental = _CachedStage(
+                    rental_key,
+                    calculate_monthly_rental_cost(SIMULATION_LENGTH_MONTHS, rental_input),
+                )
+            self.recomputed.append("rental")
+
+        results = {}
+        for label, input in inputs.items():
+            ownership_key = _field_key(input, OWNERSHIP_INPUT_FIELDS)
+            cached = self._ownership.get(label)
+            ownership_changed = cached is None or cached.key != ownership_key
+            if ownership_changed:
+                with span(f"stage:ownership:{label}"):
+                    self._ownership[label] = _CachedStage(ownership_key, run_ownership_calc(input))
+                self.recomputed.append(f"ownership:{label}")
+
+            if ownership_changed or rental_changed or label not in self._combined:
+                with span(f"stage:combine:{label}"):
+                    self._combined[label] = combine_ownership_and_rental(
+                        self._ownership[label].result, self._rental.result)
+                self.recomputed.append(f"combine:{label}")
+            results[label] = self._combined[label]
+
+        # loan options that were removed, e.g. the ARM toggled off
+        for label in set(self._ownership) - set(inputs):
+            del self._ownership[label]
+            self._combined.pop(label, None)
+
+        return results
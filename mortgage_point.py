@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+from mortgage_calc import (
+    YearlyRateType,
+    loan_segments,
+    net_proceeds_from_sale,
+    ownership_costs,
+    periodic_interest_rate,
+)
+from mortgage_input import MortgageInput
+from sim_utils import per_month
+from typing import Tuple
+
+import numpy as np
+
+
+@dataclass
+class MortgagePoint:
+    # schedule rows queried, 0 is the first month
+    months: np.ndarray
+    # the unrounded values of the run_mortgage_calc columns of the same name at
+    # those rows, shaped like months, with a leading (n_scenarios,) axis for
+    # batch inputs (see mortgage_batch)
+    loan_balance: np.ndarray
+    total_interest_paid: np.ndarray
+    total_principal_paid: np.ndarray
+    projected_home_value: np.ndarray
+    net_profit_from_home_sale: np.ndarray
+
+    @property
+    def equity(self) -> np.ndarray:
+        return self.projected_home_value - self.loan_balance
+
+
+def _after_payments(balance, rate, payment, n_payments):
+    """
+    Annuity formula for the balance after n_payments payments at a fixed rate,
+    balance * (1 + rate) ** n - payment * ((1 + rate) ** n - 1) / rate.
+    Arguments broadcast against each other.
+    """
+    growth = (1 + rate) ** n_payments
+    if np.ndim(rate) == 0:
+        # scalar loans take this path at every reset, np.where costs more than the formula
+        annuity = n_payments if rate == 0 else (growth - 1) / rate
+    else:
+        annuity = np.where(rate == 0, n_payments, (growth - 1) / np.where(rate == 0, 1, rate))
+    return balance * growth - payment * annuity
+
+
+def _annuity_payment(balance, rate, n_payments: int):
+    """
+    Returns: the payment that pays off balance with n_payments payments at rate
+    """
+    if np.ndim(rate) == 0:
+        return balance / n_payments if rate == 0 else balance * rate / (1 - (1 + rate) ** -n_payments)
+    safe_rate = np.where(rate == 0, 1, rate)
+    return np.where(rate == 0, balance / n_payments, balance * safe_rate / (1 - (1 + safe_rate) ** -n_payments))
+
+
+def _loan_after_payments(input: MortgageInput, n_payments: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Walks from one payment reset to the next (see loan_segments) instead of
+    month by month, then evaluates every query from the start of its segment,
+    so the cost depends on the number of ARM adjustments and not on the month.
+    Returns: (balance, total paid) after n_payments payments, with the leading
+    axes of batch inputs, no payments are made after the term
+    """
+    pir = periodic_interest_rate(
+        mortgage_interest_rate=input.mortgage_interest_rate, interest_rate_type=YearlyRateType.APR)
+    _, payment, _ = ownership_costs(input=input, periodic_interest_rate=pir)
+    total_term_months = input.loan_term * 12
+    segments = loan_segments(input, pir, total_term_months)
+
+    starts, rates, payments, balances, paid = [], [], [], [], []
+    balance = input.home_price - input.downpayment
+    total_paid = 0.0
+    for i, (start, rate, recompute) in enumerate(segments):
+        stop = segments[i + 1][0] if i + 1 < len(segments) else total_term_months
+        if recompute:
+            payment = _annuity_payment(balance, rate, total_term_months - start)
+        starts.append(start)
+        rates.append(rate)
+        payments.append(payment)
+        balances.append(balance)
+        paid.append(total_paid)
+        balance = _after_payments(balance, rate, payment, stop - start)
+        total_paid = total_paid + payment * (stop - start)
+
+    n_payments = np.minimum(n_payments, total_term_months)
+    segment = np.searchsorted(starts, n_payments, side="right") - 1
+    n_in_segment = n_payments - np.asarray(starts)[segment]
+
+    # every segment starts from the previous ones, so the last has the batch shape
+    lead = np.broadcast_shapes(np.shape(rates[-1]), np.shape(payments[-1]), np.shape(balances[-1]))
+
+    def at_segment(values: list) -> np.ndarray:
+        # one value per segment, scalars or (n_scenarios,) arrays, to one per query
+        if not lead:
+            return np.array(values, dtype=float)[segment]
+        return np.stack([np.broadcast_to(value, lead) for value in values], axis=-1)[..., segment]
+
+    payment = at_segment(payments)
+    return (
+        _after_payments(at_segment(balances), at_segment(rates), payment, n_in_segment),
+        at_segment(paid) + payment * n_in_segment,
+    )
+
+
+def mortgage_at(input: MortgageInput, months) -> MortgagePoint:
+    """
+    Loan, home value and sale proceeds at the given schedule rows from closed-form
+    annuity formulas, without building the monthly schedule. ARMs follow the
+    full-cap rate path of run_mortgage_calc, evaluated piecewise between resets.
+    months: a row or array of rows, e.g. 7 * 12 - 1 for the end of year 7
+    Returns: MortgagePoint, its arrays have no months axis when months is a single row
+    """
+    rows = np.atleast_1d(np.asarray(months, dtype=int))
+    if (rows < 0).any():
+        raise ValueError("Months must not be negative")
+    start_balance = per_month(input.home_price - input.downpayment)
+
+    # a row's loan_balance is after its payment, its sale repays the balance before it
+    balance, paid = _loan_after_payments(input, np.concatenate([rows, rows + 1]))
+    balance_before, balance_after = np.split(balance, 2, axis=-1)
+    paid = paid[..., len(rows):]
+    principal_paid = start_balance - balance_after
+    projected_home_value = per_month(input.home_price) * \
+        per_month(1 + input.property_appreciation) ** (rows / 12)
+    values = dict(
+        months=rows,
+        loan_balance=balance_after,
+        total_interest_paid=paid - principal_paid,
+        total_principal_paid=principal_paid,
+        projected_home_value=projected_home_value,
+        net_profit_from_home_sale=net_proceeds_from_sale(input, projected_home_value, balance_before),
+    )
+    if np.ndim(months) == 0:
+        values = {name: value[..., 0] for name, value in values.items()}
+    return MortgagePoint(**values)
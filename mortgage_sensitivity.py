@@ -0,0 +1,140 @@
+from dataclasses import dataclass, replace
+from mortgage_batch import run_mortgage_batch
+from mortgage_input import MortgageInput
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+# field: (step, relative), the field is moved down and up by step, or by
+# step * value when relative
+SENSITIVITY_STEPS = {
+    "home_price": (0.1, True),
+    "downpayment": (0.1, True),
+    "mortgage_interest_rate": (0.01, False),
+    "property_appreciation": (0.01, False),
+    "starting_cash": (0.1, True),
+    "realtor_fee_at_sale": (0.01, False),
+    "capital_gains_tax": (0.05, False),
+    "monthly_rent": (0.1, True),
+    "rental_increase_pct": (0.01, False),
+    "stock_interest_rate": (0.01, False),
+    "monthly_income": (0.1, True),
+    "yearly_increase": (0.01, False),
+    "closing_cost_percentage": (0.005, False),
+    "property_tax_rate": (0.0025, False),
+    "monthly_pmi": (100.0, False),
+    "monthly_hoa": (100.0, False),
+    "monthly_insurance": (0.2, True),
+    "monthly_maintenance_fund": (0.2, True),
+}
+
+# changes that alter the shape of the schedule, each needs its own run
+STRUCTURAL_STEPS = {
+    "loan_term": 5,
+    "arm_rates.fixed_period": 2,
+    "arm_rates.initial_arm_cap": 0.01,
+    "arm_rates.annual_arm_cap": 0.005,
+    "arm_rates.lifetime_arm_cap": 0.01,
+}
+
+# fields that may go below zero when moved down
+SIGNED_FIELDS = (
+    "property_appreciation",
+    "stock_interest_rate",
+    "rental_increase_pct",
+    "yearly_increase",
+)
+
+
+@dataclass
+class FieldSensitivity:
+    field: str
+    low_value: float
+    high_value: float
+    # final buy minus rent net worth with the field at low_value / high_value
+    low_gap: float
+    high_gap: float
+
+    @property
+    def swing(self) -> float:
+        return abs(self.high_gap - self.low_gap)
+
+
+@dataclass
+class SensitivityOutput:
+    input: MortgageInput
+    base_gap: float
+    # sorted by swing, largest first
+    fields: List[FieldSensitivity]
+
+
+def _bounds(field: str, value: float, step: float, relative: bool) -> Tuple[float, float]:
+    delta = step * abs(value) if relative else step
+    low = value - delta
+    if field not in SIGNED_FIELDS:
+        low = max(low, 0.0)
+    return low, value + delta
+
+
+def _with_field(input: MortgageInput, field: str, value) -> MortgageInput:
+    if field.startswith("arm_rates."):
+        return replace(input, arm_rates=replace(input.arm_rates, **{field.split(".", 1)[1]: value}))
+    return replace(input, **{field: value})
+
+
+def _final_gap(input: MortgageInput) -> float:
+    return float(run_mortgage_batch(input, months=[-1]).final_net_worth_gap[0])
+
+
+def run_sensitivity(
+    input: MortgageInput,
+    fields: Optional[List[str]] = None,
+) -> SensitivityOutput:
+    """
+    One-at-a-time sensitivity of the final buy minus rent net worth. All numeric
+    fields are perturbed in a single run_mortgage_batch call, loan term and ARM
+    settings (ARM loans only) in one small run each.
+    """
+    numeric = [f for f in (fields or SENSITIVITY_STEPS) if f in SENSITIVITY_STEPS]
+    structural = [
+        f for f in (fields or STRUCTURAL_STEPS) if f in STRUCTURAL_STEPS
+        and (not f.startswith("arm_rates.") or (input.is_arm and input.arm_rates))
+    ]
+
+    # row 0 is the base case, rows 2i + 1 / 2i + 2 move field i down / up
+    n_rows = 1 + 2 * len(numeric)
+    bounds = {}
+    batch_fields = {}
+    for i, field in enumerate(numeric):
+        value = float(getattr(input, field))
+        bounds[field] = _bounds(field, value, *SENSITIVITY_STEPS[field])
+        column = np.full(n_rows, value)
+        column[2 * i + 1], column[2 * i + 2] = bounds[field]
+        batch_fields[field] = column
+
+    gaps = run_mortgage_batch(replace(input, **batch_fields), months=[-1]).final_net_worth_gap
+    base_gap = float(gaps[0])
+    results = [
+        FieldSensitivity(field, *bounds[field], float(gaps[2 * i + 1]), float(gaps[2 * i + 2]))
+        for i, field in enumerate(numeric)
+    ]
+
+    for field in structural:
+        if field.startswith("arm_rates."):
+            value = getattr(input.arm_rates, field.split(".", 1)[1])
+        else:
+            value = getattr(input, field)
+        low, high = max(value - STRUCTURAL_STEPS[field], 0), value + STRUCTURAL_STEPS[field]
+        if field == "loan_term":
+            low = max(low, 1)
+        results.append(FieldSensitivity(
+            field,
+            low,
+            high,
+            _final_gap(_with_field(input, field, low)),
+            _final_gap(_with_field(input, field, high)),
+        ))
+
+    results.sort(key=lambda r: r.swing, reverse=True)
+    return SensitivityOutput(input=input, base_gap=base_gap, fields=results)
@@ -0,0 +1,191 @@
+from dataclasses import dataclass, fields, replace
+from mortgage_batch import n_scenarios, run_mortgage_batch
+from mortgage_calc import SIMULATION_LENGTH_MONTHS
+from mortgage_input import MortgageInput
+from typing import Callable
+
+import numpy as np
+
+
+@dataclass
+class SolverResult:
+    field: str
+    # shape: (n_queries,), nan where the bracket held no sign change
+    value: np.ndarray
+    # objective at value, $ for every objective in this module
+    residual: np.ndarray
+    converged: np.ndarray
+    iterations: int
+
+
+def bracketed_root(
+    objective: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    low: np.ndarray,
+    high: np.ndarray,
+    ftol: float = 1.0,
+    rtol: float = 1e-9,
+    max_iter: int = 100,
+    sign: int = 0,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Vectorized Illinois (modified regula falsi) root finding. Each query keeps
+    a bracket [low, high] with a sign change and stops once |objective| <= ftol
+    or the bracket is narrower than rtol * (1 + |x|).
+
+    objective(x, index) evaluates the queries listed in index at x in one call.
+    sign: 1 (or -1) to only return points where the objective is >= 0 (<= 0),
+        the end of the final bracket on that side when it gets too narrow
+    Returns: (root, residual, converged, iterations)
+    """
+    a = np.array(low, dtype=float)
+    b = np.array(high, dtype=float)
+    index = np.arange(len(a))
+    fa = objective(a, index)
+    fb = objective(b, index)
+
+    root = np.full(len(a), np.nan)
+    residual = np.full(len(a), np.nan)
+    converged = np.zeros(len(a), dtype=bool)
+
+    def acceptable(f: np.ndarray) -> np.ndarray:
+        return (np.abs(f) <= ftol) & (sign * f >= 0)
+
+    for bound, f_bound in ((a, fa), (b, fb)):
+        hit = acceptable(f_bound) & ~converged
+        root[hit], residual[hit], converged[hit] = bound[hit], f_bound[hit], True
+
+    active = ~converged & (np.sign(fa) != np.sign(fb))
+    # -1 when the last update moved a, +1 when it moved b
+    side = np.zeros(len(a))
+    # objective at a and b, fa / fb are halved by the Illinois steps
+    ya, yb = fa.copy(), fb.copy()
+    iterations = 0
+    while active.any() and iterations < max_iter:
+        iterations += 1
+        i = index[active]
+        c = np.where(fb[i] != fa[i], (a[i] * fb[i] - b[i] * fa[i]) / (fb[i] - fa[i]),
+                     (a[i] + b[i]) / 2)
+        fc = objective(c, i)
+
+        hit = acceptable(fc)
+        narrow = ~hit & (np.abs(b[i] - a[i]) <= rtol * (1 + np.abs(c)))
+        done = hit | narrow
+        root[i[hit]], residual[i[hit]] = c[hit], fc[hit]
+        if not sign:
+            root[i[narrow]], residual[i[narrow]] = c[narrow], fc[narrow]
+
+        move_b = np.sign(fc) == np.sign(fb[i])
+        j, k = i[move_b], i[~move_b]
+        fa[j] = np.where(side[j] == -1, fa[j] / 2, fa[j])
+        b[j], fb[j], yb[j], side[j] = c[move_b], fc[move_b], fc[move_b], -1
+        fb[k] = np.where(side[k] == 1, fb[k] / 2, fb[k])
+        a[k], fa[k], ya[k], side[k] = c[~move_b], fc[~move_b], fc[~move_b], 1
+
+        if sign:
+            # the end of the final bracket on the accepted side
+            n = i[narrow]
+            use_a = sign * ya[n] >= 0
+            root[n], residual[n] = np.where(use_a, a[n], b[n]), np.where(use_a, ya[n], yb[n])
+        converged[i[done]] = True
+        active[i[done]] = False
+
+    return root, residual, converged, iterations
+
+
+def _queries(input: MortgageInput, n_queries: int) -> MortgageInput:
+    return replace(input, **{
+        f.name: np.broadcast_to(getattr(input, f.name), n_queries) for f in fields(input)
+        if isinstance(getattr(input, f.name), np.ndarray)
+    })
+
+
+def _take(input: MortgageInput, index: np.ndarray) -> MortgageInput:
+    return replace(input, **{
+        f.name: getattr(input, f.name)[index] for f in fields(input)
+        if isinstance(getattr(input, f.name), np.ndarray)
+    })
+
+
+def _solve(
+    input: MortgageInput,
+    field: str,
+    year,
+    low,
+    high,
+    column: str,
+    reduce: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    ftol: float,
+    sign: int = 0,
+) -> SolverResult:
+    n_queries = np.broadcast_shapes(
+        (n_scenarios(input),), np.shape(year), np.shape(low), np.shape(high))[0]
+    queries = _queries(input, n_queries)
+    last_month = np.broadcast_to(np.asarray(year, dtype=int) * 12 - 1, n_queries)
+    if ((last_month < 0) | (last_month >= SIMULATION_LENGTH_MONTHS)).any():
+        raise ValueError(f"year must be between 1 and {SIMULATION_LENGTH_MONTHS // 12}")
+    columns = ("net_worth_after_sale", "net_worth_if_renting") if column == "gap" else (column,)
+
+    def objective(x: np.ndarray, index: np.ndarray) -> np.ndarray:
+        batch = replace(_take(queries, index), **{field: x})
+        output = run_mortgage_batch(
+            batch,
+            columns=columns,
+            months=range(int(last_month[index].max()) + 1),
+        )
+        if column == "gap":
+            values = output.columns["net_worth_after_sale"] - output.columns["net_worth_if_renting"]
+        else:
+            values = output.columns[column]
+        return reduce(np.broadcast_to(values, (len(index), values.shape[1])), last_month[index])
+
+    root, residual, converged, iterations = bracketed_root(
+        objective,
+        np.broadcast_to(low, n_queries),
+        np.broadcast_to(high, n_queries),
+        ftol=ftol,
+        sign=sign,
+    )
+    return SolverResult(field, root, residual, converged, iterations)
+
+
+def _at_month(values: np.ndarray, month: np.ndarray) -> np.ndarray:
+    return values[np.arange(len(values)), month]
+
+
+def _min_through_month(values: np.ndarray, month: np.ndarray) -> np.ndarray:
+    after = np.arange(values.shape[1]) > month[:, None]
+    return np.where(after, np.inf, values).min(axis=1)
+
+
+def solve_break_even(
+    input: MortgageInput,
+    field: str,
+    year,
+    low,
+    high,
+    ftol: float = 1.0,
+) -> SolverResult:
+    """
+    Value of field (e.g. home_price, monthly_rent, downpayment) at which buying
+    and renting reach the same net worth at the end of year. input may be a
+    batch (see mortgage_batch), year, low and high may be arrays, every
+    combination is one query and all queries are solved together.
+    """
+    return _solve(input, field, year, low, high, "gap", _at_month, ftol)
+
+
+def solve_max_affordable(
+    input: MortgageInput,
+    low,
+    high,
+    field: str = "home_price",
+    year=SIMULATION_LENGTH_MONTHS // 12,
+    ftol: float = 1.0,
+) -> SolverResult:
+    """
+    Largest value of field (home_price by default) for which cash_reserve does
+    not go negative through the end of year: the returned value is on the
+    feasible side, its residual (the minimum cash reserve) is between 0 and
+    ftol. Broadcasting works as in solve_break_even.
+    """
+    return _solve(input, field, year, low, high, "cash_reserve", _min_through_month, ftol, sign=1)
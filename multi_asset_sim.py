@@ -0,0 +1,224 @@
+from dataclasses import dataclass
+from monte_carlo_sim import FAN_PERCENTILES, block_seeds, summarize_paths
+from profiling import profiled, span
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class PortfolioInput:
+    names: Tuple[str, ...]
+    # shape: (n_assets,)
+    start_balances: np.ndarray
+    # yearly, shape: (n_assets,)
+    annual_means: np.ndarray
+    # yearly covariance of returns, shape: (n_assets, n_assets), see covariance_from
+    annual_covariance: np.ndarray
+    years: int = 30
+    n_simulations: int = 10_000
+    # weights the portfolio is reset to and contributions are split by,
+    # defaults to the starting allocation
+    target_weights: Optional[np.ndarray] = None
+    # months between rebalancing to target_weights, 0 never rebalances
+    rebalance_every: int = 12
+    # added to the portfolio at the start of every month
+    monthly_contribution: float = 0.0
+    # taken before the return of withdraw_month, from every asset in proportion
+    # to its balance, the portfolio is floored at 0
+    withdraw_month: int = 0
+    withdraw_amount: float = 0.0
+    seed: int = 42
+
+    @property
+    def n_assets(self) -> int:
+        return len(self.names)
+
+    @property
+    def n_months(self) -> int:
+        return self.years * 12
+
+    @property
+    def weights(self) -> np.ndarray:
+        weights = np.asarray(
+            self.start_balances if self.target_weights is None else self.target_weights, dtype=float)
+        if (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("Target weights must be non-negative and not all zero")
+        return weights / weights.sum()
+
+
+@dataclass
+class MultiAssetOutput:
+    input: PortfolioInput
+    # shape: (n_simulations, n_months)
+    total_paths: np.ndarray
+    # shape: (n_simulations, n_assets)
+    final_balances: np.ndarray
+    # shape: (n_assets, n_months), averaged over the paths
+    mean_balances: np.ndarray
+    # shape: (len(FAN_PERCENTILES), n_months)
+    percentile_bands: np.ndarray
+    # shape: (len(REPRESENTATIVE_PERCENTILES), n_months)
+    representative_paths: np.ndarray
+
+    @property
+    def final_values(self) -> np.ndarray:
+        return self.total_paths[:, -1]
+
+    def percentile_path(self, percentile: float) -> np.ndarray:
+        """
+        percentile: one of FAN_PERCENTILES
+        """
+        if percentile not in FAN_PERCENTILES:
+            raise ValueError(f"Percentile {percentile} is not one of {FAN_PERCENTILES}")
+        return self.percentile_bands[FAN_PERCENTILES.index(percentile)]
+
+
+def covariance_from(volatilities: np.ndarray, correlation: np.ndarray) -> np.ndarray:
+    """
+    Returns: covariance matrix of assets with these yearly volatilities and correlations
+    """
+    volatilities = np.asarray(volatilities, dtype=float)
+    correlation = np.asarray(correlation, dtype=float)
+    if correlation.shape != (len(volatilities), len(volatilities)):
+        raise ValueError(f"Correlation matrix must be {len(volatilities)} x {len(volatilities)}")
+    if not np.allclose(correlation, correlation.T) or not np.allclose(np.diag(correlation), 1):
+        raise ValueError("Correlation matrix must be symmetric with ones on the diagonal")
+    return np.outer(volatilities, volatilities) * correlation
+
+
+def covariance_factor(covariance: np.ndarray) -> np.ndarray:
+    """
+    Cholesky factor, or for a singular covariance (e.g. a riskless asset) the
+    square root from its eigendecomposition.
+    Returns: L with L @ L.T == covariance
+    """
+    covariance = np.asarray(covariance, dtype=float)
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        if eigenvalues.min() < -1e-10 * max(1.0, eigenvalues.max()):
+            raise ValueError("Covariance matrix is not positive semi-definite")
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+
+def rebalance_periods(input: PortfolioInput) -> List[Tuple[int, int]]:
+    """
+    Returns: [start, end) months between consecutive rebalances / the withdrawal
+    """
+    boundaries = {0, input.n_months}
+    if input.rebalance_every > 0:
+        boundaries.update(range(input.rebalance_every, input.n_months, input.rebalance_every))
+    if input.withdraw_amount > 0 and 0 < input.withdraw_month < input.n_months:
+        boundaries.add(input.withdraw_month)
+    boundaries = sorted(boundaries)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def simulate_returns(
+    input: PortfolioInput,
+    factor: np.ndarray,
+    rng: np.random.Generator,
+    n_paths: int,
+) -> np.ndarray:
+    """
+    One matrix product correlates the shocks of every path, asset and month.
+    Returns: monthly gross returns, shape (n_assets, n_paths, n_months)
+    """
+    shocks = rng.standard_normal((input.n_assets, n_paths * input.n_months))
+    returns = (factor / np.sqrt(12)) @ shocks
+    returns += 1 + np.asarray(input.annual_means, dtype=float)[:, None] / 12
+    return returns.reshape(input.n_assets, n_paths, input.n_months)
+
+
+def simulate_balances(
+    input: PortfolioInput,
+    returns: np.ndarray,
+    weights: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Balances follow x[t] = (x[t - 1] + contribution) * returns[t]. With G the
+    cumulative product of the returns and S the running sum of contribution /
+    G[t - 1], a period starting at t0 with balances x0 is
+    x[t] = G[t] * (x0 / G[t0 - 1] + S[t] - S[t0 - 1]), so the returns are
+    compounded once and each rebalance / the withdrawal only costs array
+    arithmetic over its months. Overwrites returns.
+    Returns: (total_paths of shape (n_paths, n_months), balance sums over the
+    paths of shape (n_assets, n_months), final balances of shape (n_paths, n_assets))
+    """
+    n_paths = returns.shape[1]
+    growth = np.cumprod(returns, axis=-1, out=returns)
+    if input.monthly_contribution != 0:
+        contributed = np.empty_like(growth)
+        contributed[..., 0] = 1
+        np.divide(1, growth[..., :-1], out=contributed[..., 1:])
+        np.cumsum(contributed, axis=-1, out=contributed)
+        contributed *= input.monthly_contribution * weights[:, None, None]
+
+    balances = np.repeat(np.asarray(input.start_balances, dtype=float)[:, None], n_paths, axis=1)
+    total_paths = np.empty((n_paths, input.n_months))
+    balance_sums = np.empty((input.n_assets, input.n_months))
+    for start, end in rebalance_periods(input):
+        if start == input.withdraw_month and input.withdraw_amount > 0:
+            total = balances.sum(axis=0)
+            kept = np.divide(total - input.withdraw_amount, total, out=np.zeros_like(total), where=total > 0)
+            balances *= np.clip(kept, 0, 1)
+        if start > 0 and input.rebalance_every > 0 and start % input.rebalance_every == 0:
+            balances = weights[:, None] * balances.sum(axis=0)
+
+        level = balances if start == 0 else balances / growth[..., start - 1]
+        if input.monthly_contribution != 0:
+            if start > 0:
+                level -= contributed[..., start - 1]
+            path = growth[..., start:end] * (level[..., None] + contributed[..., start:end])
+        else:
+            path = growth[..., start:end] * level[..., None]
+        total_paths[:, start:end] = path.sum(axis=0)
+        balance_sums[:, start:end] = path.sum(axis=1)
+        balances = path[..., -1]
+
+    return total_paths, balance_sums, balances.T
+
+
+@profiled("multi_asset")
+def run_multi_asset_simulation(input: PortfolioInput, chunk_size: int = 2048) -> MultiAssetOutput:
+    """
+    Monthly returns are normal with mean annual_means / 12 and covariance
+    annual_covariance / 12. Paths are simulated chunk_size at a time, each chunk
+    from its own generator (see block_seeds), which bounds the memory of the
+    (paths, assets, months) return arrays.
+    """
+    for name, expected in (
+        ("start_balances", (input.n_assets,)),
+        ("annual_means", (input.n_assets,)),
+        ("annual_covariance", (input.n_assets, input.n_assets)),
+    ):
+        if np.shape(getattr(input, name)) != expected:
+            raise ValueError(f"{name} has shape {np.shape(getattr(input, name))}, expected {expected}")
+    factor = covariance_factor(input.annual_covariance)
+    weights = input.weights
+
+    total_paths = np.empty((input.n_simulations, input.n_months))
+    final_balances = np.empty((input.n_simulations, input.n_assets))
+    balance_sums = np.zeros((input.n_assets, input.n_months))
+    starts = range(0, input.n_simulations, chunk_size)
+    with span("simulate_chunks"):
+        for start, seed_sequence in zip(starts, block_seeds(input.seed, len(starts))):
+            stop = min(start + chunk_size, input.n_simulations)
+            returns = simulate_returns(input, factor, np.random.default_rng(seed_sequence), stop - start)
+            total_paths[start:stop], chunk_sums, final_balances[start:stop] = simulate_balances(
+                input, returns, weights)
+            balance_sums += chunk_sums
+
+    with span("summarize_paths"):
+        percentile_bands, representative_paths = summarize_paths(total_paths)
+
+    return MultiAssetOutput(
+        input=input,
+        total_paths=total_paths,
+        final_balances=final_balances,
+        mean_balances=balance_sums / input.n_simulations,
+        percentile_bands=percentile_bands,
+        representative_paths=representative_paths,
+    )
@@ -1,9 +1,12 @@
 
 import numpy as np
 import streamlit as st
-from ui.monte_carlo.inputs import display_inputs
+from profiling import span
+from result_cache import cached_monte_carlo
+from ui.debug_panel import debug_profiler, display_debug_panel, display_result_cache_stats
+from ui.monte_carlo.inputs import display_inputs, display_precision_inputs, display_sampling_inputs
 from ui.monte_carlo.outputs import display_output
-from monte_carlo_sim import run_monte_carlo
+from monte_carlo_sim import run_monte_carlo, run_monte_carlo_adaptive
 
 
 st.set_page_config(page_title="Monte Carlo Simulation", layout="wide")
@@ -12,5 +15,20 @@ st.markdown("Simulate different investment returns and appreciation scenarios.")
 
 
 input = display_inputs()
-output = run_monte_carlo(input)
-display_output(output)
+sampling, control_variate, history = display_sampling_inputs()
+target = display_precision_inputs()
+profiler = debug_profiler()
+with profiler:
+    if target is None and history is None:
+        # shared with other sessions and processes, bootstrap runs depend on the history file
+        output = cached_monte_carlo(input, sampling=sampling, control_variate=control_variate)
+    elif target is None:
+        output = run_monte_carlo(
+            input, sampling=sampling, control_variate=control_variate, history=history)
+    else:
+        output = run_monte_carlo_adaptive(
+            input, target, sampling=sampling, control_variate=control_variate, history=history)
+    with span("display_output"):
+        display_output(output)
+display_debug_panel(profiler)
+display_result_cache_stats()
@@ -0,0 +1,22 @@
+import streamlit as st
+from mortgage_batch import run_mortgage_batch, scenario_grid
+from mortgage_calc import build_mortgage_inputs
+from ui.app_session import init_form_defaults
+from ui.mortgage_calc.form import simulation_kwargs
+from ui.rent_vs_buy_heatmap.inputs import display_inputs
+from ui.rent_vs_buy_heatmap.outputs import display_output
+
+
+st.set_page_config(page_title="Rent vs Buy Heatmap", layout="wide")
+st.title("🗺️ Rent vs Buy Sensitivity Heatmap")
+st.markdown(
+    "Sweep two assumptions at once. Every other input comes from the Rent vs Buy form.")
+
+init_form_defaults()
+input = display_inputs(build_mortgage_inputs(**simulation_kwargs()))
+batch_input = scenario_grid(
+    input.input,
+    **{input.y.field: input.y.values, input.x.field: input.x.values},
+)
+output = run_mortgage_batch(batch_input, months=[-1])
+display_output(input, output)
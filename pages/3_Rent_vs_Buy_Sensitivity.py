@@ -0,0 +1,18 @@
+import streamlit as st
+from mortgage_calc import build_mortgage_inputs
+from mortgage_sensitivity import run_sensitivity
+from ui.app_session import init_form_defaults
+from ui.mortgage_calc.form import simulation_kwargs
+from ui.rent_vs_buy_sensitivity.outputs import display_output
+
+
+st.set_page_config(page_title="Rent vs Buy Sensitivity", layout="wide")
+st.title("🌪️ Rent vs Buy Sensitivity")
+st.markdown(
+    "Each input is moved down and up on its own while every other input keeps its "
+    "value from the Rent vs Buy form.")
+
+init_form_defaults()
+inputs = build_mortgage_inputs(**simulation_kwargs())
+label = st.selectbox("Loan Type", list(inputs))
+display_output(label, run_sensitivity(inputs[label]))
@@ -0,0 +1,18 @@
+import streamlit as st
+from mortgage_calc import build_mortgage_inputs
+from rent_vs_buy_monte_carlo import run_rent_vs_buy_monte_carlo
+from ui.app_session import init_form_defaults
+from ui.mortgage_calc.form import simulation_kwargs
+from ui.rent_vs_buy_monte_carlo.inputs import display_inputs
+from ui.rent_vs_buy_monte_carlo.outputs import display_output
+
+
+st.set_page_config(page_title="Rent vs Buy Monte Carlo", layout="wide")
+st.title("🎲 Rent vs Buy Monte Carlo")
+st.markdown(
+    "Home appreciation, stock returns and rent increases vary around the averages "
+    "from the Rent vs Buy form. Buyer and renter invest in the same market.")
+
+init_form_defaults()
+label, input, market = display_inputs(build_mortgage_inputs(**simulation_kwargs()))
+display_output(label, run_rent_vs_buy_monte_carlo(input, market))
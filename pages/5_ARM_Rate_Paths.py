@@ -0,0 +1,30 @@
+import streamlit as st
+from arm_rate_sim import run_arm_rate_simulation
+from mortgage_calc import build_mortgage_inputs, run_ownership_calc
+from ui.app_session import init_form_defaults
+from ui.arm_rate_sim.inputs import display_inputs
+from ui.arm_rate_sim.outputs import display_output
+from ui.mortgage_calc.form import simulation_kwargs
+
+
+st.set_page_config(page_title="ARM Rate Paths", layout="wide")
+st.title("🏦 ARM Rate Paths")
+st.markdown(
+    "Instead of assuming the rate rises by the full cap at every reset, the ARM "
+    "follows simulated rate-index paths within its caps. Loans come from the Rent vs Buy form.")
+
+init_form_defaults()
+inputs = build_mortgage_inputs(**simulation_kwargs())
+arm_inputs = [input for input in inputs.values() if input.is_arm and input.arm_rates]
+if not arm_inputs:
+    st.info("Enable the 5/1 ARM in the Rent vs Buy form to simulate its rate.")
+    st.stop()
+
+arm_input = arm_inputs[0]
+model = display_inputs(arm_input.mortgage_interest_rate)
+fixed_total_interest = {
+    ("ARM, Full Cap Every Reset" if input.is_arm else label):
+        float(run_ownership_calc(input)["total_interest_paid"][-1])
+    for label, input in inputs.items()
+}
+display_output(run_arm_rate_simulation(arm_input, model), fixed_total_interest)
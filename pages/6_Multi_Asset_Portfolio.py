@@ -0,0 +1,25 @@
+import streamlit as st
+from multi_asset_sim import run_multi_asset_simulation
+from profiling import span
+from ui.debug_panel import debug_profiler, display_debug_panel
+from ui.multi_asset.inputs import display_inputs
+from ui.multi_asset.outputs import display_output
+
+
+st.set_page_config(page_title="Multi-Asset Portfolio", layout="wide")
+st.title("💼 Multi-Asset Portfolio Monte Carlo")
+st.markdown(
+    "Simulate a portfolio of correlated asset classes, optionally rebalanced to target weights.")
+
+
+input = display_inputs()
+profiler = debug_profiler()
+with profiler:
+    try:
+        output = run_multi_asset_simulation(input)
+    except ValueError as error:
+        st.error(str(error))
+        st.stop()
+    with span("display_output"):
+        display_output(output)
+display_debug_panel(profiler)
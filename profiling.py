@@ -0,0 +1,143 @@
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import wraps
+from typing import Callable, Iterator, List, Optional
+
+import json
+import logging
+import threading
+import time
+import tracemalloc
+
+
+logger = logging.getLogger("profiling")
+
+# tracemalloc is process wide: it runs while any profiler traces memory, and is
+# only stopped by the last of them if a profiler started it
+_tracing_lock = threading.Lock()
+_tracing_profilers = 0
+_started_tracing = False
+
+
+def _acquire_tracing() -> None:
+    global _tracing_profilers, _started_tracing
+    with _tracing_lock:
+        if _tracing_profilers == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_profilers += 1
+
+
+def _release_tracing() -> None:
+    global _tracing_profilers, _started_tracing
+    with _tracing_lock:
+        _tracing_profilers -= 1
+        if _tracing_profilers == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+@dataclass
+class Span:
+    name: str
+    # seconds since the profiler started
+    start: float
+    seconds: float
+    # 0 for top-level spans
+    depth: int
+    # net bytes allocated by the process during the span, including other
+    # sessions' threads, None unless the profiler traces memory
+    allocated: Optional[int] = None
+
+
+class Profiler:
+    """
+    Records the spans opened with span() / @profiled while it is active:
+
+        with Profiler(trace_memory=True) as profiler:
+            run_mortgage_simulation(...)
+        profiler.spans
+
+    Each thread / context has its own active profiler, so concurrent Streamlit
+    sessions do not mix their spans. Without an active profiler span() only
+    costs a context variable lookup.
+    """
+
+    def __init__(self, trace_memory: bool = False, log: bool = True):
+        self.trace_memory = trace_memory
+        self.log = log
+        self.spans: List[Span] = []
+        self._depth = 0
+        self._origin = 0.0
+        self._token = None
+
+    def __enter__(self) -> "Profiler":
+        if self.trace_memory:
+            _acquire_tracing()
+        self._origin = time.perf_counter()
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _active.reset(self._token)
+        if self.trace_memory:
+            _release_tracing()
+        if self.log and logger.isEnabledFor(logging.INFO):
+            for s in self.spans:
+                logger.info(json.dumps(asdict(s)))
+
+    @contextmanager
+    def _span(self, name: str) -> Iterator[None]:
+        depth = self._depth
+        self._depth += 1
+        # None rather than a wrong number when tracing was stopped behind the profilers' back
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        before = tracemalloc.get_traced_memory()[0] if tracing else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            allocated = None
+            if before is not None and tracemalloc.is_tracing():
+                allocated = tracemalloc.get_traced_memory()[0] - before
+            self._depth = depth
+            self.spans.append(Span(name, start - self._origin, seconds, depth, allocated))
+
+    def ordered_spans(self) -> List[Span]:
+        """
+        Returns: spans in the order they were opened, spans are recorded when they close
+        """
+        return sorted(self.spans, key=lambda s: (s.start, s.depth))
+
+
+_active: ContextVar[Optional[Profiler]] = ContextVar("active_profiler", default=None)
+
+_NO_SPAN = nullcontext()
+
+
+def span(name: str):
+    """
+    Context manager timing a named stage on the active profiler, if any.
+    """
+    profiler = _active.get()
+    if profiler is None:
+        return _NO_SPAN
+    return profiler._span(name)
+
+
+def profiled(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator version of span().
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _active.get()
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler._span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,95 @@
+from dataclasses import dataclass, field
+from typing import Tuple
+
+import numpy as np
+
+
+@dataclass
+class QuantileSketch:
+    """
+    One quantile sketch per column (e.g. per simulated month). Values are counted
+    in log-spaced buckets, so any quantile is returned within relative_accuracy of
+    a true sample value, memory is fixed by the value range and not by how many
+    values were added, and two sketches merge by adding their counts.
+
+    Magnitudes below min_value fall in a zero bucket, magnitudes above max_value
+    in the outermost bucket on their side.
+    """
+    n_columns: int
+    relative_accuracy: float = 0.01
+    min_value: float = 1.0
+    max_value: float = 1e13
+    # shape: (n_columns, n_buckets), buckets ordered by value:
+    # negative values (largest magnitude first), zero, positive values
+    counts: np.ndarray = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.counts is None:
+            self.counts = np.zeros((self.n_columns, 2 * self.n_keys + 1), dtype=np.int64)
+
+    @property
+    def gamma(self) -> float:
+        return (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+
+    @property
+    def min_key(self) -> int:
+        return int(np.ceil(np.log(self.min_value) / np.log(self.gamma)))
+
+    @property
+    def n_keys(self) -> int:
+        max_key = int(np.ceil(np.log(self.max_value) / np.log(self.gamma)))
+        return max_key - self.min_key + 1
+
+    @property
+    def count(self) -> np.ndarray:
+        return self.counts.sum(axis=1)
+
+    def _bucket_index(self, values: np.ndarray) -> np.ndarray:
+        magnitude = np.abs(values)
+        keys = np.ceil(np.log(np.maximum(magnitude, self.min_value)) / np.log(self.gamma))
+        keys = np.clip(keys.astype(np.int64) - self.min_key, 0, self.n_keys - 1)
+        return np.where(
+            magnitude < self.min_value,
+            self.n_keys,
+            np.where(values > 0, self.n_keys + 1 + keys, self.n_keys - 1 - keys),
+        )
+
+    def bucket_values(self) -> np.ndarray:
+        """
+        Returns: the representative value of every bucket, shape (n_buckets,)
+        """
+        positive = 2 * self.gamma ** (np.arange(self.n_keys) + self.min_key) / (self.gamma + 1)
+        return np.concatenate([-positive[::-1], [0.0], positive])
+
+    def add(self, values: np.ndarray) -> None:
+        """
+        values: shape (n_values, n_columns)
+        """
+        index = self._bucket_index(np.asarray(values, dtype=float))
+        n_buckets = self.counts.shape[1]
+        flat = index + np.arange(self.n_columns) * n_buckets
+        self.counts += np.bincount(
+            flat.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if (self.n_columns, self.relative_accuracy, self.min_value, self.max_value) != \
+                (other.n_columns, other.relative_accuracy, other.min_value, other.max_value):
+            raise ValueError("Only sketches with the same shape and accuracy can be merged")
+        self.counts += other.counts
+
+    def quantile(self, q: float) -> np.ndarray:
+        """
+        Returns: the q-quantile (0 <= q <= 1) of every column, shape (n_columns,)
+        """
+        cumulative = np.cumsum(self.counts, axis=1)
+        rank = q * (cumulative[:, -1] - 1)
+        bucket = np.argmax(cumulative > rank[:, None], axis=1)
+        return self.bucket_values()[bucket]
+
+    def histogram(self, column: int = -1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns: (bucket_values, counts) of the non-empty buckets of one column
+        """
+        counts = self.counts[column]
+        non_empty = counts > 0
+        return self.bucket_values()[non_empty], counts[non_empty]
@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+from datetime import date
+from monte_carlo_sim import block_seeds
+from mortgage_calc import (
+    SIMULATION_LENGTH_MONTHS,
+    YearlyRateType,
+    loan_cash_flows,
+    net_proceeds_from_sale,
+    ownership_costs,
+    periodic_interest_rate,
+)
+from mortgage_input import MortgageInput
+from sim_utils import linear_recurrence, month_dates
+from typing import List
+
+import numpy as np
+
+
+@dataclass
+class MarketUncertainty:
+    n_paths: int = 10_000
+    # annual volatilities around property_appreciation, stock_interest_rate and
+    # rental_increase_pct of the MortgageInput
+    appreciation_vol: float = 0.05
+    stock_vol: float = 0.15
+    rent_growth_vol: float = 0.02
+    home_stock_correlation: float = 0.0
+    seed: int = 42
+
+
+@dataclass
+class RentVsBuyMonteCarloOutput:
+    input: MortgageInput
+    market: MarketUncertainty
+    ds: List[date]
+    # shape: (n_paths, n_months), net_worth_after_sale - net_worth_if_renting
+    net_worth_gap: np.ndarray
+    # shape: (n_paths,), first month in which buying is ahead, -1 if it never is
+    crossover_month: np.ndarray
+
+    @property
+    def final_gap(self) -> np.ndarray:
+        return self.net_worth_gap[:, -1]
+
+    @property
+    def probability_buy_ahead(self) -> float:
+        return float((self.final_gap >= 0).mean())
+
+    def gap_percentile_path(self, percentile: float) -> np.ndarray:
+        return np.percentile(self.net_worth_gap, percentile, axis=0)
+
+
+def run_rent_vs_buy_monte_carlo(
+    input: MortgageInput,
+    market: MarketUncertainty,
+    simulation_length_months: int = SIMULATION_LENGTH_MONTHS,
+    chunk_size: int = 2048,
+) -> RentVsBuyMonteCarloOutput:
+    """
+    run_mortgage_calc with random monthly home appreciation and stock returns
+    (optionally correlated) and random yearly rent increases. The loan and the
+    ownership costs do not depend on the markets and are computed once, the
+    home value, sale proceeds and both cash reserves are computed per path.
+    Buyer and renter invest in the same market on each path. With all
+    volatilities at 0 every path equals the deterministic model.
+    """
+    n = simulation_length_months
+    months = np.arange(n)
+    pir = periodic_interest_rate(
+        mortgage_interest_rate=input.mortgage_interest_rate, interest_rate_type=YearlyRateType.APR)
+    monthly_operating_expenses, monthly_mortgage, down_plus_closing = ownership_costs(
+        input=input,
+        periodic_interest_rate=pir,
+    )
+    loan = loan_cash_flows(
+        monthly_operating_expenses=monthly_operating_expenses,
+        periodic_mortgage_payment=monthly_mortgage,
+        input=input,
+        periodic_interest_rate=pir,
+        simulation_length_months=n,
+    )
+
+    monthly_income = input.monthly_income * (1 + input.yearly_increase) ** (months / 12)
+    # same cash flow as mortgage_schedule: savings minus the ownership cost
+    owner_increments = monthly_income - 2 * loan["monthly_cost_ownership"]
+
+    stock_mean = input.stock_interest_rate / 12
+    home_mean = (1 + input.property_appreciation) ** (1 / 12) - 1
+    rho = market.home_stock_correlation
+    n_years = (n + 11) // 12
+
+    net_worth_gap = np.empty((market.n_paths, n))
+    starts = range(0, market.n_paths, chunk_size)
+    for start, seed_sequence in zip(starts, block_seeds(market.seed, len(starts))):
+        stop = min(start + chunk_size, market.n_paths)
+        rng = np.random.default_rng(seed_sequence)
+        stock_z, other_z = rng.standard_normal((2, stop - start, n))
+        home_z = rho * stock_z + np.sqrt(1 - rho ** 2) * other_z
+
+        stock_returns = 1 + stock_mean + market.stock_vol / np.sqrt(12) * stock_z
+        home_growth = 1 + home_mean + market.appreciation_vol / np.sqrt(12) * home_z
+        rent_growth = 1 + input.rental_increase_pct + \
+            market.rent_growth_vol * rng.standard_normal((stop - start, n_years))
+
+        # value at the start of each month, month 0 is the purchase price
+        projected_home_value = np.empty((stop - start, n))
+        projected_home_value[:, 0] = input.home_price
+        projected_home_value[:, 1:] = input.home_price * np.cumprod(home_growth[:, :-1], axis=1)
+        net_profit_at_sale = net_proceeds_from_sale(
+            input, projected_home_value, loan["balance"][:-1])
+
+        cash_reserve = linear_recurrence(
+            np.full(stop - start, input.starting_cash - down_plus_closing),
+            stock_returns,
+            owner_increments,
+        )
+        net_worth_after_sale = net_profit_at_sale
+        net_worth_after_sale[:, 0] += input.starting_cash - down_plus_closing
+        net_worth_after_sale[:, 1:] += cash_reserve[:, :-1]
+
+        # rent goes up at the start of every lease year, including the first
+        rental_cost = input.monthly_rent * np.cumprod(rent_growth, axis=1)[:, months // 12]
+        net_worth_if_renting = linear_recurrence(
+            np.full(stop - start, input.starting_cash),
+            stock_returns,
+            monthly_income - rental_cost,
+        )
+        np.subtract(net_worth_after_sale, net_worth_if_renting, out=net_worth_gap[start:stop])
+
+    buy_ahead = net_worth_gap >= 0
+    crossover_month = np.where(buy_ahead.any(axis=1), buy_ahead.argmax(axis=1), -1)
+
+    return RentVsBuyMonteCarloOutput(
+        input=input,
+        market=market,
+        ds=list(month_dates(input.purchase_date, n)),
+        net_worth_gap=net_worth_gap,
+        crossover_month=crossover_month,
+    )
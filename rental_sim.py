@@ -1,9 +1,23 @@
 from dataclasses import dataclass
 from datetime import date
-from dateutil.relativedelta import relativedelta
 from mortgage_input import MortgageInput
+from profiling import profiled
+from simulation_result import SimulationResult
+from sim_utils import linear_recurrence, month_dates, per_month
 
-import pandas as pd
+import numpy as np
+
+
+# MortgageInput fields read by rental_schedule
+RENTAL_INPUT_FIELDS = (
+    "monthly_rent",
+    "rental_increase_pct",
+    "monthly_income",
+    "yearly_increase",
+    "stock_interest_rate",
+    "starting_cash",
+    "purchase_date",
+)
 
 
 @dataclass
@@ -13,30 +27,35 @@ class RentalData:
     net_worth_if_renting: float
 
 
-def calculate_monthly_rental_cost(simulation_length_months: int, input: MortgageInput) -> pd.DataFrame:
-    rental_cost_monthly = input.monthly_rent
-    cash_reserve_rental = input.starting_cash
-    data = []
-    for row in range(simulation_length_months):
-        ds = input.purchase_date + relativedelta(months=row + 1)
-        # Rent path updates
-        if row % 12 == 0:
-            rental_cost_monthly *= (1 + input.rental_increase_pct)
-
-        monthly_income = input.monthly_income * \
-            (1 + input.yearly_increase) ** (row / 12)
-        monthly_savings = monthly_income - rental_cost_monthly
-
-        cash_reserve_rental = (
-            cash_reserve_rental * (1 + input.stock_interest_rate / 12)
-            + monthly_savings
-        )
-        data.append(
-            RentalData(
-                ds=ds,
-                rental_cost=round(rental_cost_monthly, 2),
-                net_worth_if_renting=round(cash_reserve_rental, 2),
-            )
-        )
-
-    return pd.DataFrame([vars(s) for s in data])
+def rental_schedule(simulation_length_months: int, input: MortgageInput) -> dict[str, np.ndarray]:
+    """
+    Rent and renter's cash reserve for every month at once. Numeric fields of
+    input may be (n_scenarios,) arrays, columns are then (n_scenarios, n_months).
+    Returns: {RentalData field: column}
+    """
+    months = np.arange(simulation_length_months)
+
+    # rent goes up at the start of every lease year, including the first
+    rental_cost_monthly = per_month(input.monthly_rent) * \
+        per_month(1 + input.rental_increase_pct) ** (months // 12 + 1)
+    monthly_income = per_month(input.monthly_income) * \
+        per_month(1 + input.yearly_increase) ** (months / 12)
+    monthly_savings = monthly_income - rental_cost_monthly
+
+    cash_reserve_rental = linear_recurrence(
+        input.starting_cash,
+        per_month(1 + input.stock_interest_rate / 12),
+        monthly_savings,
+    )
+
+    return {
+        "ds": list(month_dates(input.purchase_date, simulation_length_months)),
+        "rental_cost": np.round(rental_cost_monthly, 2),
+        "net_worth_if_renting": np.round(cash_reserve_rental, 2),
+    }
+
+
+@profiled("rental")
+def calculate_monthly_rental_cost(simulation_length_months: int, input: MortgageInput) -> SimulationResult:
+    schedule = rental_schedule(simulation_length_months, input)
+    return SimulationResult(schedule.pop("ds"), schedule)
@@ -0,0 +1,379 @@
+"""
+Two-tier cache of simulation results shared by every Streamlit session and
+process on the machine:
+
+- memory: LRU of decoded results in this process, bounded in bytes
+- disk: one uncompressed .npz of the result arrays per key, written to a
+  temporary file and renamed into place, so concurrent processes only ever see
+  complete entries, and evicted least recently used first once the directory
+  is over its size limit
+
+Keys hash the canonical JSON of the engine name, its ENGINE_VERSION and its
+inputs, so changing an engine only needs a version bump.
+
+    FINANCIAL_CALC_CACHE_DIR   disk tier location, empty for memory only
+                               (default ~/.cache/financial_calc)
+    FINANCIAL_CALC_CACHE_MB    disk tier size limit (default 512)
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+from datetime import date
+from monte_carlo_sim import ENGINE_VERSION as MONTE_CARLO_ENGINE_VERSION
+from monte_carlo_sim import Estimate, MonteCarloInput, MonteCarloOutput, run_monte_carlo
+from mortgage_calc import ENGINE_VERSION as MORTGAGE_ENGINE_VERSION
+from mortgage_calc import build_mortgage_inputs, run_mortgage_simulation
+from mortgage_input import MortgageInput
+from pathlib import Path
+from simulation_result import SimulationResult
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import hashlib
+import json
+import numpy as np
+import os
+import tempfile
+import threading
+import zipfile
+
+
+T = TypeVar("T")
+Arrays = Dict[str, np.ndarray]
+
+# a sweep of the disk tier evicts down to this fraction of its limit, so the
+# next few writes don't need another one
+DISK_LOW_WATER = 0.8
+
+
+def _canonical(value: Any) -> Any:
+    if is_dataclass(value):
+        return {"__type__": type(value).__name__,
+                **{f.name: _canonical(getattr(value, f.name)) for f in fields(value)}}
+    if isinstance(value, np.ndarray):
+        return {"dtype": str(value.dtype), "shape": list(value.shape), "data": _canonical(value.tolist())}
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (bool, str)) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        # 600000 and 600000.0 give the same result, so they share a key
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    raise TypeError(f"Cannot build a cache key from {type(value).__name__}")
+
+
+def result_key(engine: str, version: int, *args: Any, **kwargs: Any) -> str:
+    """
+    Returns: hex digest identifying a result of version of engine for these arguments
+    """
+    payload = json.dumps(
+        [engine, version, _canonical(args), _canonical(kwargs)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass
+class ResultCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    memory_evictions: int = 0
+    disk_evictions: int = 0
+    # unreadable disk entries, dropped and recomputed, and failed writes
+    disk_errors: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+class ResultCache:
+    def __init__(
+        self,
+        directory: Optional[Path],
+        max_memory_bytes: int = 256 * 2 ** 20,
+        max_disk_bytes: int = 512 * 2 ** 20,
+    ):
+        """
+        directory: disk tier location, None for a memory-only cache
+        """
+        self.directory = Path(directory) if directory is not None else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = ResultCacheStats()
+        self._memory: "OrderedDict[str, tuple[Any, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        # size of the disk tier at the last sweep plus what this process wrote
+        # since, None until the first write sweeps
+        self._disk_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls) -> "ResultCache":
+        directory = os.environ.get("FINANCIAL_CALC_CACHE_DIR", str(Path.home() / ".cache" / "financial_calc"))
+        max_disk_mb = float(os.environ.get("FINANCIAL_CALC_CACHE_MB", 512))
+        return cls(Path(directory) if directory else None, max_disk_bytes=int(max_disk_mb * 2 ** 20))
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], T],
+        encode: Callable[[T], Arrays],
+        decode: Callable[[Arrays], T],
+        nbytes: Callable[[T], int],
+    ) -> T:
+        """
+        encode / decode: the result to and from named arrays for the disk tier
+        nbytes: memory held by a result, for the memory tier limit
+        Returns: the cached result for key, or compute() stored under key
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return self._memory[key][0]
+
+        arrays = self._read(key)
+        if arrays is not None:
+            value = decode(arrays)
+            with self._lock:
+                self.stats.disk_hits += 1
+        else:
+            value = compute()
+            arrays = encode(value)
+            with self._lock:
+                self.stats.misses += 1
+            self._write(key, arrays)
+        self._remember(key, value, nbytes(value))
+        return value
+
+    def _remember(self, key: str, value: Any, nbytes: int) -> None:
+        with self._lock:
+            if key in self._memory or nbytes > self.max_memory_bytes:
+                return
+            self._memory[key] = (value, nbytes)
+            self._memory_bytes += nbytes
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (_, evicted) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted
+                self.stats.memory_evictions += 1
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.npz"
+
+    def _read(self, key: str) -> Optional[Arrays]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                arrays = {name: archive[name] for name in archive.files}
+            try:
+                # the modification time orders eviction, a hit makes the entry recent
+                os.utime(path)
+            except FileNotFoundError:
+                # evicted by another process after it was read
+                pass
+            return arrays
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            with self._lock:
+                self.stats.disk_errors += 1
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return None
+
+    def _write(self, key: str, arrays: Arrays) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            file = tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False)
+            try:
+                with file:
+                    np.savez(file, **arrays)
+                size = os.stat(file.name).st_size
+                # atomic, readers in other processes see the old state or the whole entry
+                os.replace(file.name, path)
+            except BaseException:
+                Path(file.name).unlink(missing_ok=True)
+                raise
+            with self._lock:
+                if self._disk_bytes is not None:
+                    self._disk_bytes += size
+                sweep = self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes
+            if sweep:
+                self._evict_disk()
+        except OSError:
+            # an unwritable or full disk only costs the disk tier, the result is kept in memory
+            with self._lock:
+                self.stats.disk_errors += 1
+
+    def _evict_disk(self) -> None:
+        """
+        Lists the whole disk tier, which includes the writes of other processes,
+        and evicts the least recently used entries down to DISK_LOW_WATER of the limit
+        """
+        entries = []
+        for path in self.directory.glob("*/*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # evicted by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_disk_bytes:
+            for _, size, path in sorted(entries):
+                if total <= self.max_disk_bytes * DISK_LOW_WATER:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                with self._lock:
+                    self.stats.disk_evictions += 1
+        with self._lock:
+            self._disk_bytes = total
+
+    def clear(self) -> None:
+        """
+        Empties the memory tier of this process, the disk tier is left alone
+        """
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **vars(self.stats),
+                "hit_rate": self.stats.hit_rate,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+
+# shared by every session of the app process
+RESULT_CACHE = ResultCache.from_environment()
+
+
+def _read_only(output: MonteCarloOutput) -> MonteCarloOutput:
+    # cached outputs are shared between sessions
+    for array in (output.total_paths, output.stock_paths, output.cash_paths, output.final_values,
+                  output.percentile_bands, output.representative_paths):
+        array.flags.writeable = False
+    return output
+
+
+def _monte_carlo_nbytes(output: MonteCarloOutput) -> int:
+    # final_values is a column of total_paths
+    return sum(array.nbytes for array in (
+        output.total_paths, output.stock_paths, output.cash_paths,
+        output.percentile_bands, output.representative_paths))
+
+
+def _encode_monte_carlo(output: MonteCarloOutput) -> Arrays:
+    _read_only(output)
+    # total_paths and final_values are rebuilt from the stock and cash paths
+    return {
+        "stock_paths": output.stock_paths,
+        "cash_paths": output.cash_paths,
+        "percentile_bands": output.percentile_bands,
+        "representative_paths": output.representative_paths,
+        "final_estimate_names": np.array(list(output.final_estimates)),
+        "final_estimates": np.array([[e.value, e.standard_error] for e in output.final_estimates.values()]),
+    }
+
+
+def _decode_monte_carlo(input: MonteCarloInput, arrays: Arrays) -> MonteCarloOutput:
+    total_paths = arrays["stock_paths"] + arrays["cash_paths"]
+    return _read_only(MonteCarloOutput(
+        total_paths=total_paths,
+        stock_paths=arrays["stock_paths"],
+        cash_paths=arrays["cash_paths"],
+        final_values=total_paths[:, -1],
+        percentile_bands=arrays["percentile_bands"],
+        representative_paths=arrays["representative_paths"],
+        final_estimates={
+            str(name): Estimate(float(value), float(standard_error))
+            for name, (value, standard_error) in zip(arrays["final_estimate_names"], arrays["final_estimates"])
+        },
+        input=input,
+    ))
+
+
+def cached_monte_carlo(
+    input: MonteCarloInput,
+    sampling: str = "pseudo",
+    control_variate: bool = False,
+    seed: int = 42,
+    n_replicates: int = 16,
+    cache: Optional[ResultCache] = None,
+) -> MonteCarloOutput:
+    """
+    run_monte_carlo through the result cache (RESULT_CACHE by default). The
+    arrays of the returned output are read-only, they may be shared with other
+    sessions.
+    """
+    cache = cache or RESULT_CACHE
+    key = result_key(
+        "monte_carlo", MONTE_CARLO_ENGINE_VERSION, input,
+        sampling=sampling, control_variate=control_variate, seed=seed, n_replicates=n_replicates)
+    return cache.get_or_compute(
+        key,
+        lambda: run_monte_carlo(
+            input, sampling=sampling, control_variate=control_variate, seed=seed, n_replicates=n_replicates),
+        _encode_monte_carlo,
+        lambda arrays: _decode_monte_carlo(input, arrays),
+        _monte_carlo_nbytes,
+    )
+
+
+def _encode_mortgage(result: SimulationResult) -> Arrays:
+    return {"ds": np.array([d.toordinal() for d in result.ds]), **{name: result[name] for name in result}}
+
+
+def _mortgage_nbytes(result: SimulationResult) -> int:
+    return sum(result[name].nbytes for name in result)
+
+
+def _decode_mortgage(arrays: Arrays) -> SimulationResult:
+    return SimulationResult(
+        [date.fromordinal(int(d)) for d in arrays["ds"]],
+        {name: values for name, values in arrays.items() if name != "ds"},
+    )
+
+
+def cached_mortgage_simulation(
+    compute: Callable[..., Dict[str, SimulationResult]] = run_mortgage_simulation,
+    cache: Optional[ResultCache] = None,
+    **simulation_kwargs,
+) -> Dict[str, SimulationResult]:
+    """
+    run_mortgage_simulation with each loan option's result cached under its
+    MortgageInput. When any option is missing, compute (e.g. an
+    IncrementalMortgageSimulation's run) produces all of them.
+    """
+    cache = cache or RESULT_CACHE
+    inputs: Dict[str, MortgageInput] = build_mortgage_inputs(**simulation_kwargs)
+    keys = {label: result_key("mortgage", MORTGAGE_ENGINE_VERSION, input) for label, input in inputs.items()}
+    computed: Dict[str, SimulationResult] = {}
+
+    def compute_all() -> None:
+        if not computed:
+            computed.update(compute(**simulation_kwargs))
+
+    def result(label: str) -> SimulationResult:
+        def compute_one() -> SimulationResult:
+            compute_all()
+            return computed[label]
+        return cache.get_or_compute(keys[label], compute_one, _encode_mortgage, _decode_mortgage, _mortgage_nbytes)
+
+    return {label: result(label) for label in inputs}
@@ -0,0 +1,54 @@
+from calendar import monthrange
+from datetime import date
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+
+@lru_cache(maxsize=64)
+def month_dates(start: date, n_months: int) -> Tuple[date, ...]:
+    """
+    Returns: the dates start + 1 month, ..., start + n_months months, clamping the
+    day to the end of shorter months the same way relativedelta does
+    """
+    dates = []
+    for offset in range(1, n_months + 1):
+        year, month = divmod(start.month - 1 + offset, 12)
+        year += start.year
+        month += 1
+        day = min(start.day, monthrange(year, month)[1])
+        dates.append(date(year, month, day))
+    return tuple(dates)
+
+
+def per_month(value) -> np.ndarray:
+    """
+    Returns: value with a month axis appended, scenario values are scalars or
+    (n_scenarios,) arrays and the month axis is last
+    """
+    return np.asarray(value, dtype=float)[..., None]
+
+
+def linear_recurrence(start, multipliers, increments) -> np.ndarray:
+    """
+    Solves x[k + 1] = multipliers[k] * x[k] + increments[k] along the last axis
+    without a Python loop, using a cumulative product and a weighted prefix sum.
+
+    start broadcasts against the leading axes, multipliers and increments against
+    each other. Multipliers must be non-zero.
+
+    Returns: x[1:], shaped like the broadcast of all three
+    """
+    start = np.asarray(start, dtype=float)[..., None]
+    increments = np.asarray(increments, dtype=float)
+    multipliers = np.asarray(multipliers, dtype=float)
+    shape = np.broadcast_shapes(start.shape, multipliers.shape, increments.shape)
+
+    growth = np.cumprod(np.broadcast_to(multipliers, shape), axis=-1)
+    # reuse one buffer for the prefix sum, these arrays can be (n_paths, n_months)
+    path = np.divide(np.broadcast_to(increments, shape), growth)
+    np.cumsum(path, axis=-1, out=path)
+    path += start
+    path *= growth
+    return path
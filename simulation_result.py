@@ -0,0 +1,70 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import TYPE_CHECKING, Iterator, List, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class SimulationResult:
+    """
+    Monthly simulation output as one contiguous float array per column over a
+    shared month index (ds). Columns are returned as read-only views, so cached
+    results can be shared safely, and a DataFrame is only built by to_frame.
+    """
+
+    def __init__(self, ds: Sequence[date], columns: dict[str, np.ndarray]):
+        self.ds: List[date] = list(ds)
+        self._columns: dict[str, np.ndarray] = {}
+        for name, values in columns.items():
+            values = np.ascontiguousarray(values, dtype=float)
+            if values.shape != (len(self.ds),):
+                raise ValueError(
+                    f"Column {name} has shape {values.shape}, expected ({len(self.ds)},)")
+            # a read-only view, the caller's array stays writeable
+            values = values.view()
+            values.flags.writeable = False
+            self._columns[name] = values
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        # like __getitem__ and __iter__, the month index is not a column
+        return name in self._columns
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self.ds)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def join(self, other: "SimulationResult") -> "SimulationResult":
+        """
+        Returns: the columns of both results, which must share the month index;
+                 no column is copied
+        """
+        if self.ds != other.ds:
+            raise ValueError("Only results over the same months can be joined")
+        return SimulationResult(self.ds, {**self._columns, **other._columns})
+
+    def between(self, start: date, end: date) -> "SimulationResult":
+        """
+        Returns: the months from start to end (inclusive) as views of this result
+        """
+        first, last = bisect_left(self.ds, start), bisect_right(self.ds, end)
+        return SimulationResult(
+            self.ds[first:last],
+            {name: values[first:last] for name, values in self._columns.items()},
+        )
+
+    def to_frame(self) -> "pd.DataFrame":
+        # pandas is slow to import and only needed here
+        import pandas as pd
+        return pd.DataFrame({"ds": self.ds, **self._columns})
@@ -0,0 +1,32 @@
+from arm_rate_sim import RateIndexModel
+
+import streamlit as st
+
+
+RATE_MODELS = {"vasicek": "Vasicek", "cir": "Cox-Ingersoll-Ross"}
+
+
+def display_inputs(arm_rate: float) -> RateIndexModel:
+    kind = st.selectbox("Index Model", list(RATE_MODELS), format_func=RATE_MODELS.get)
+    n_paths = st.slider("Number of Rate Paths", 1_000, 50_000, 10_000, step=1_000)
+
+    st.markdown("### 📉 Rate Index")
+    initial_index = st.number_input("Index Today (%)", value=4.0, step=0.25) / 100
+    long_run_index = st.number_input("Long-Run Index (%)", value=4.0, step=0.25) / 100
+    mean_reversion = st.slider("Mean Reversion Speed (per year)", 0.0, 1.0, 0.2, step=0.05)
+    if kind == "cir":
+        volatility = st.slider("Volatility (× √index)", 0.0, 0.3, 0.05, step=0.01)
+    else:
+        volatility = st.slider("Volatility (%)", 0.0, 5.0, 1.0, step=0.1) / 100
+    margin = st.number_input(
+        "Margin (%)", value=round((arm_rate - initial_index) * 100, 2), step=0.25) / 100
+
+    return RateIndexModel(
+        kind=kind,
+        initial_index=initial_index,
+        long_run_index=long_run_index,
+        mean_reversion=mean_reversion,
+        volatility=volatility,
+        margin=margin,
+        n_paths=n_paths,
+    )
@@ -0,0 +1,53 @@
+from arm_rate_sim import ARMSimulationOutput
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+
+def _band_chart(x, paths: np.ndarray, color: str, y_title: str, shape: str = "linear") -> go.Figure:
+    p10, p50, p90 = np.percentile(paths, [10, 50, 90], axis=0)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=x, y=p90, line=dict(width=0, shape=shape), showlegend=False,
+                             hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=x, y=p10, fill="tonexty", line=dict(width=0, shape=shape),
+                             fillcolor=color.replace("1)", "0.3)"), name="10th - 90th Percentile",
+                             hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=x, y=p50, line=dict(color=color, width=2, shape=shape),
+                             name="Median"))
+    fig.update_layout(
+        yaxis=dict(title=dict(text=y_title)),
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        legend=dict(x=0, y=1.1, orientation="h"),
+    )
+    return fig
+
+
+def display_output(output: ARMSimulationOutput, fixed_total_interest: dict[str, float]) -> None:
+    total_interest = output.total_interest
+    st.markdown("### 🏦 Total Interest Paid")
+    columns = st.columns(2 + len(fixed_total_interest))
+    columns[0].metric("ARM, Median", f"${np.median(total_interest):,.0f}")
+    columns[1].metric("ARM, 90th Percentile", f"${np.percentile(total_interest, 90):,.0f}")
+    for column, (label, value) in zip(columns[2:], fixed_total_interest.items()):
+        column.metric(label, f"${value:,.0f}")
+
+    fig = go.Figure(go.Histogram(x=total_interest, nbinsx=60, marker_color="steelblue",
+                                 name="ARM"))
+    for label, value in fixed_total_interest.items():
+        fig.add_vline(x=value, line_dash="dash", annotation_text=label)
+    fig.update_layout(xaxis=dict(title=dict(text="Total Interest ($)")), plot_bgcolor="white",
+                      paper_bgcolor="white", showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### Note Rate After Each Reset")
+        reset_dates = [output.ds[m] for m in output.reset_months]
+        st.plotly_chart(_band_chart(reset_dates, output.note_rates * 100, "rgba(46,139,87,1)",
+                                    "Rate (%)", shape="hv"), use_container_width=True)
+    with col2:
+        st.markdown("#### Monthly Principal & Interest")
+        st.plotly_chart(_band_chart(output.ds, output.payment, "rgba(70,130,180,1)",
+                                    "Payment ($)"), use_container_width=True)
@@ -0,0 +1,51 @@
+from contextlib import nullcontext
+from dataclasses import asdict
+from profiling import Profiler
+from result_cache import RESULT_CACHE
+
+import json
+import streamlit as st
+
+
+def debug_profiler():
+    """
+    Opt-in sidebar switch for stage timings.
+    Returns: a Profiler to wrap the page in, or a no-op context when switched off
+    """
+    with st.sidebar.expander("🐞 Debug"):
+        enabled = st.checkbox("Record stage timings", key="debug_timings")
+        trace_memory = st.checkbox(
+            "Track allocations (slower)", key="debug_trace_memory", disabled=not enabled)
+    return Profiler(trace_memory=trace_memory) if enabled else nullcontext()
+
+
+def display_debug_panel(profiler) -> None:
+    if not isinstance(profiler, Profiler):
+        return
+    spans = profiler.ordered_spans()
+    with st.sidebar.expander("⏱️ Stage Timings", expanded=True):
+        if not spans:
+            st.write("Nothing was recorded in this run.")
+            return
+        table = {
+            "Stage": ["· " * s.depth + s.name for s in spans],
+            "ms": [round(s.seconds * 1e3, 2) for s in spans],
+        }
+        if profiler.trace_memory:
+            table["Allocated KB"] = [
+                None if s.allocated is None else round(s.allocated / 1024, 1) for s in spans]
+        st.dataframe(table, hide_index=True, use_container_width=True)
+        st.caption(f"Top-level total: {sum(s.seconds for s in spans if s.depth == 0) * 1e3:,.1f} ms")
+        st.download_button(
+            "Download spans (JSON lines)",
+            "\n".join(json.dumps(asdict(s)) for s in spans),
+            file_name="spans.jsonl",
+        )
+
+
+def display_result_cache_stats() -> None:
+    with st.sidebar.expander("🗄️ Result Cache"):
+        stats = RESULT_CACHE.snapshot()
+        st.metric("Hit Rate", f"{stats.pop('hit_rate'):.0%}")
+        st.dataframe({"Counter": list(stats), "Value": list(stats.values())}, hide_index=True)
+        st.caption(f"Disk tier: {RESULT_CACHE.directory or 'off'}")
@@ -1,5 +1,15 @@
 import streamlit as st
-from monte_carlo_sim import MonteCarloInput
+from historical_returns import HistoricalReturns, load_historical_returns
+from monte_carlo_sim import SAMPLING_METHODS, MonteCarloInput, PrecisionTarget
+from typing import Optional, Tuple
+
+
+SAMPLING_LABELS = {
+    "pseudo": "Pseudo-random",
+    "antithetic": "Antithetic Variates",
+    "sobol": "Sobol (Quasi-Monte Carlo)",
+    "bootstrap": "Historical Bootstrap",
+}
 
 
 def display_inputs() -> MonteCarloInput:
@@ -48,3 +58,58 @@ def display_inputs() -> MonteCarloInput:
         monthly_stock_contribution=monthly_stock_contribution,  # NEW
         monthly_cash_contribution=monthly_cash_contribution     # NEW
     )
+
+
+def _history_inputs() -> HistoricalReturns:
+    path = st.text_input(
+        "Historical Returns File", value="",
+        help="Monthly returns as a .npy array of shape (months, 2) with stock and cash columns, "
+             "or an uncompressed Arrow file with \"stock\" and \"cash\" columns")
+    block_months = st.slider(
+        "Bootstrap Block Length (months)", 1, 60, 12,
+        help="Consecutive months resampled together, longer blocks keep more of the autocorrelation")
+    if not path:
+        st.info("Enter the path of a historical returns file to bootstrap from.")
+        st.stop()
+    try:
+        history = load_historical_returns(path, block_months)
+    except (OSError, ValueError) as error:
+        st.error(f"Could not read {path}: {error}")
+        st.stop()
+    stock_mean, cash_mean = history.annual_means()
+    st.caption(
+        f"{history.n_months / 12:.0f} years of history, average stock return {stock_mean:.1%}, "
+        f"cash {cash_mean:.1%}. The return assumptions above are not used.")
+    return history
+
+
+def display_sampling_inputs() -> Tuple[str, bool, Optional[HistoricalReturns]]:
+    """
+    Returns: (sampling, control_variate, history) for run_monte_carlo
+    """
+    st.markdown("### 🎲 Sampling")
+    sampling = st.selectbox(
+        "Sampling Method", SAMPLING_METHODS, format_func=SAMPLING_LABELS.get,
+        help="Antithetic and Sobol sampling reach the same precision with fewer simulations, "
+             "the historical bootstrap resamples blocks of months from a returns file")
+    if sampling == "bootstrap":
+        return sampling, False, _history_inputs()
+    control_variate = st.checkbox(
+        "Control Variate for the Mean", value=False,
+        help="Corrects the mean final value with its analytic expectation")
+    return sampling, control_variate, None
+
+
+def display_precision_inputs() -> Optional[PrecisionTarget]:
+    """
+    Returns: the precision to simulate to, None to run Number of Simulations paths
+    """
+    adaptive = st.checkbox(
+        "Run Until Precise", value=False,
+        help="Adds simulations in batches until the 95% confidence intervals of the median and "
+             "10th percentile final values are narrow enough, instead of using Number of Simulations")
+    if not adaptive:
+        return None
+    relative_width = st.slider("Target Confidence Interval Width (% of value)", 0.5, 10.0, 2.0, 0.5) / 100
+    time_budget = st.slider("Time Budget (seconds)", 1, 60, 10)
+    return PrecisionTarget(relative_width=relative_width, time_budget=float(time_budget))
@@ -1,17 +1,34 @@
 import streamlit as st
-from monte_carlo_sim import MonteCarloOutput
+from monte_carlo_sim import FAN_PERCENTILES, REPRESENTATIVE_PERCENTILES, MonteCarloOutput
 import matplotlib.pyplot as plt
 import numpy as np
 
 
+PERCENTILE_LABELS = {10: "10th Percentile", 50: "Median", 90: "90th Percentile"}
+
+
 def display_output(output: MonteCarloOutput) -> None:
     input = output.input
 
     st.markdown("### 📊 Simulated Net Worth Over Time")
 
+    # drawn from the precomputed bands, so the chart costs the same for any number of simulations
     fig, ax = plt.subplots(figsize=(12, 6))
-    for i in range(min(100, input.n_simulations)):
-        ax.plot(output.total_paths[i], alpha=0.1, linewidth=0.8)
+    months = np.arange(input.n_months)
+    for i in range(len(FAN_PERCENTILES) // 2):
+        low, high = FAN_PERCENTILES[i], FAN_PERCENTILES[-1 - i]
+        ax.fill_between(
+            months,
+            output.percentile_bands[i],
+            output.percentile_bands[-1 - i],
+            color="tab:blue",
+            alpha=0.15,
+            linewidth=0,
+            label=f"{low}th-{high}th Percentile",
+        )
+
+    for percentile, path in zip(REPRESENTATIVE_PERCENTILES, output.representative_paths):
+        ax.plot(path, linewidth=0.8, alpha=0.8, label=f"Sample Path Ending at {percentile}th Percentile")
 
     ax.plot(output.median_path, color='black', label="Median", linewidth=2)
 
@@ -27,16 +44,27 @@ def display_output(output: MonteCarloOutput) -> None:
     ax.set_xlabel("Years")
     ax.set_ylabel("Total Portfolio Value ($)")
     ax.set_title("Simulated Net Worth After Timed Withdrawal")
-    ax.legend()
+    ax.legend(loc="upper left")
 
     st.pyplot(fig)
+    plt.close(fig)
 
     st.markdown("### 📈 Final Portfolio Value Statistics")
-    st.write(f"Median: ${np.median(output.final_values):,.0f}")
-    st.write(
-        f"10th Percentile: ${np.percentile(output.final_values, 10):,.0f}")
-    st.write(
-        f"90th Percentile: ${np.percentile(output.final_values, 90):,.0f}")
+    convergence = output.convergence
+    if convergence is not None:
+        widths = ", ".join(
+            f"{PERCENTILE_LABELS[p]} ${width:,.0f} ({width / output.final_estimates[f'p{p}'].value:.1%})"
+            for p, width in convergence.ci_widths.items())
+        message = (
+            f"Used {input.n_simulations:,} simulations in {convergence.seconds:.1f} s. "
+            f"{convergence.target.confidence:.0%} confidence interval widths: {widths}")
+        if convergence.target_met:
+            st.success(message)
+        else:
+            st.warning(f"Stopped before reaching the target precision. {message}")
+    for label, key in (("Mean", "mean"), *((PERCENTILE_LABELS[p], f"p{p}") for p in (50, 10, 90))):
+        estimate = output.final_estimates[key]
+        st.write(f"{label}: ${estimate.value:,.0f} (± ${estimate.standard_error:,.0f} standard error)")
 
     st.markdown("### 🏡 Home Purchase")
     st.write(f"Withdraw Year: {input.withdraw_year}")
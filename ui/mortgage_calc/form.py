@@ -1,5 +1,6 @@
-from mortgage_calc import run_mortgage_simulation
-import pandas as pd
+from mortgage_incremental import IncrementalMortgageSimulation
+from result_cache import cached_mortgage_simulation
+from simulation_result import SimulationResult
 import streamlit as st
 
 
@@ -103,11 +104,8 @@ def render_form() -> bool:
         return v
 
 
-def run_simulation_if_submitted(submitted: bool) -> dict[str, pd.DataFrame]:
-    """Run the simulation if the form was submitted."""
-    if not submitted:
-        return st.session_state.get("dfs")
-
+def simulation_kwargs() -> dict:
+    """Collect the run_mortgage_simulation arguments from the form's session state."""
     def pct(key): return st.session_state[key] / 100
 
     loan_options = {
@@ -131,7 +129,7 @@ def run_simulation_if_submitted(submitted: bool) -> dict[str, pd.DataFrame]:
             "arm_lifetime_cap": pct("arm_lifetime_cap"),
         }
 
-    dfs = run_mortgage_simulation(
+    return dict(
         home_price=st.session_state.home_price,
         downpayment=st.session_state.downpayment,
         loan_options=loan_options,
@@ -153,5 +151,17 @@ def run_simulation_if_submitted(submitted: bool) -> dict[str, pd.DataFrame]:
         monthly_maintenance_fund=st.session_state.monthly_maintenance_fund,
     )
 
-    st.session_state["dfs"] = dfs
-    return dfs
+
+def run_simulation_if_submitted(submitted: bool) -> dict[str, SimulationResult]:
+    """Run the simulation if the form was submitted."""
+    if not submitted:
+        return st.session_state.get("results")
+
+    # loan options already run by any session are read from the result cache,
+    # otherwise only the stages affected by the edited fields are recomputed
+    simulation = st.session_state.setdefault(
+        "mortgage_simulation", IncrementalMortgageSimulation())
+    results = cached_mortgage_simulation(compute=simulation.run, **simulation_kwargs())
+
+    st.session_state["results"] = results
+    return results
@@ -1,20 +1,22 @@
-import pandas as pd
+from datetime import date
+from profiling import span
+from simulation_result import SimulationResult
 import streamlit as st
 
 
-def display_summary_stats(dfs: dict[str, pd.DataFrame], selected_range: tuple[pd.Timestamp, pd.Timestamp]) -> None:
+def display_summary_stats(results: dict[str, SimulationResult], selected_range: tuple[date, date]) -> None:
     st.header("📊 Summary Statistics by Loan Type")
 
     with st.expander("Summary Overview", expanded=True):
-        cols = st.columns(len(dfs))  # one column per loan type
+        cols = st.columns(len(results))  # one column per loan type
 
-        for col, (label, df) in zip(cols, dfs.items()):
-            df_filtered = df[(df['ds'] >= selected_range[0])
-                             & (df['ds'] <= selected_range[1])]
+        for col, (label, result) in zip(cols, results.items()):
+            with span("summary_stats:filter"):
+                filtered = result.between(*selected_range)
 
-            final_buy = df_filtered['net_worth_after_sale'].iloc[-1]
-            final_rent = df_filtered['net_worth_if_renting'].iloc[-1]
-            cash_negative_months = (df_filtered['cash_reserve'] < 0).sum()
+            final_buy = filtered['net_worth_after_sale'][-1]
+            final_rent = filtered['net_worth_if_renting'][-1]
+            cash_negative_months = (filtered['cash_reserve'] < 0).sum()
 
             with col:
                 st.markdown(f"### {label}")
@@ -23,7 +25,7 @@ def display_summary_stats(dfs: dict[str, pd.DataFrame], selected_range: tuple[pd
                 st.write(
                     f"📉 Negative Cash Reserve Months: **{cash_negative_months}**")
 
-                st.dataframe(pd.DataFrame({
+                st.dataframe({
                     "Metric": [
                         "Min Cash Reserve",
                         "Max Cash Reserve",
@@ -33,11 +35,11 @@ def display_summary_stats(dfs: dict[str, pd.DataFrame], selected_range: tuple[pd
                         "Avg Profit from Sale"
                     ],
                     "Value": [
-                        f"${df_filtered['cash_reserve'].min():,.0f}",
-                        f"${df_filtered['cash_reserve'].max():,.0f}",
-                        f"${df_filtered['cash_reserve'].mean():,.0f}",
-                        f"${df_filtered['loan_balance'].min():,.0f}",
-                        f"${df_filtered['monthly_cost_ownership'].mean():,.0f}",
-                        f"${df_filtered['net_profit_from_home_sale'].mean():,.0f}"
+                        f"${filtered['cash_reserve'].min():,.0f}",
+                        f"${filtered['cash_reserve'].max():,.0f}",
+                        f"${filtered['cash_reserve'].mean():,.0f}",
+                        f"${filtered['loan_balance'].min():,.0f}",
+                        f"${filtered['monthly_cost_ownership'].mean():,.0f}",
+                        f"${filtered['net_profit_from_home_sale'].mean():,.0f}"
                     ]
-                }), use_container_width=True)
+                }, use_container_width=True)
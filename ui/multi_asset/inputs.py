@@ -0,0 +1,85 @@
+from multi_asset_sim import PortfolioInput, covariance_from
+from typing import List
+
+import numpy as np
+import streamlit as st
+
+
+DEFAULT_ASSETS = [
+    {"Asset": "US Stocks", "Balance ($)": 300_000.0, "Return (%)": 7.0, "Volatility (%)": 16.0, "Target (%)": 50.0},
+    {"Asset": "International Stocks", "Balance ($)": 150_000.0, "Return (%)": 6.5, "Volatility (%)": 18.0,
+     "Target (%)": 20.0},
+    {"Asset": "Bonds", "Balance ($)": 150_000.0, "Return (%)": 4.0, "Volatility (%)": 6.0, "Target (%)": 25.0},
+    {"Asset": "Cash", "Balance ($)": 50_000.0, "Return (%)": 3.0, "Volatility (%)": 0.5, "Target (%)": 5.0},
+]
+
+DEFAULT_CORRELATIONS = {
+    frozenset(("US Stocks", "International Stocks")): 0.8,
+    frozenset(("US Stocks", "Bonds")): 0.1,
+    frozenset(("International Stocks", "Bonds")): 0.1,
+}
+
+REBALANCE_OPTIONS = {"Never": 0, "Monthly": 1, "Quarterly": 3, "Yearly": 12}
+
+
+def _correlation_inputs(names: List[str]) -> np.ndarray:
+    st.markdown("### 🔗 Correlations")
+    st.caption("Only the entries below the diagonal are used, the matrix is mirrored from them.")
+    defaults = {"Asset": names} | {
+        name: [1.0 if name == other else DEFAULT_CORRELATIONS.get(frozenset((name, other)), 0.0)
+               for other in names]
+        for name in names
+    }
+    # keyed by the asset names, so adding or renaming an asset starts from the defaults
+    edited = st.data_editor(defaults, key=f"correlations:{'|'.join(names)}",
+                            disabled=["Asset"], hide_index=True)
+    matrix = np.tril(np.array([edited[name] for name in names], dtype=float).T, -1)
+    return matrix + matrix.T + np.eye(len(names))
+
+
+def display_inputs() -> PortfolioInput:
+    years = st.slider("Years", 5, 40, 30)
+    n_simulations = st.slider("Number of Simulations", 1_000, 100_000, 10_000, step=1_000)
+
+    st.markdown("### 💼 Assets")
+    assets = [
+        row for row in st.data_editor(DEFAULT_ASSETS, num_rows="dynamic", key="assets")
+        if row.get("Asset")
+    ]
+    if not assets:
+        st.info("Add at least one asset.")
+        st.stop()
+    names = [row["Asset"] for row in assets]
+    if len(set(names)) != len(names):
+        st.error("Asset names must be unique.")
+        st.stop()
+
+    def column(name: str) -> np.ndarray:
+        return np.array([row.get(name) or 0.0 for row in assets], dtype=float)
+
+    correlation = _correlation_inputs(names)
+
+    st.markdown("### ⚖️ Rebalancing")
+    rebalance = st.selectbox("Rebalance to Target Weights", list(REBALANCE_OPTIONS), index=3)
+
+    st.markdown("### ➕ Contributions and Withdrawal")
+    monthly_contribution = st.number_input(
+        "Monthly Contribution ($)", value=0.0, step=100.0, help="Split by the target weights")
+    withdraw_year = st.slider("Withdrawal Year", 0, years, 5)
+    withdraw_amount = st.number_input(
+        "Withdrawal ($)", value=0.0, min_value=0.0, step=10_000.0,
+        help="Taken from every asset in proportion to its balance")
+
+    return PortfolioInput(
+        names=tuple(names),
+        start_balances=column("Balance ($)"),
+        annual_means=column("Return (%)") / 100,
+        annual_covariance=covariance_from(column("Volatility (%)") / 100, correlation),
+        years=years,
+        n_simulations=n_simulations,
+        target_weights=column("Target (%)"),
+        rebalance_every=REBALANCE_OPTIONS[rebalance],
+        monthly_contribution=monthly_contribution,
+        withdraw_month=withdraw_year * 12,
+        withdraw_amount=withdraw_amount,
+    )
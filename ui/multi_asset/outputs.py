@@ -0,0 +1,64 @@
+import streamlit as st
+from monte_carlo_sim import FAN_PERCENTILES, REPRESENTATIVE_PERCENTILES
+from multi_asset_sim import MultiAssetOutput
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+def display_output(output: MultiAssetOutput) -> None:
+    input = output.input
+    months = np.arange(input.n_months)
+    ticks = np.arange(0, input.n_months + 1, 12 if input.years <= 30 else 24)
+
+    st.markdown("### 📊 Simulated Portfolio Value Over Time")
+    fig, ax = plt.subplots(figsize=(12, 6))
+    for i in range(len(FAN_PERCENTILES) // 2):
+        low, high = FAN_PERCENTILES[i], FAN_PERCENTILES[-1 - i]
+        ax.fill_between(
+            months,
+            output.percentile_bands[i],
+            output.percentile_bands[-1 - i],
+            color="tab:blue",
+            alpha=0.15,
+            linewidth=0,
+            label=f"{low}th-{high}th Percentile",
+        )
+    for percentile, path in zip(REPRESENTATIVE_PERCENTILES, output.representative_paths):
+        ax.plot(path, linewidth=0.8, alpha=0.8, label=f"Sample Path Ending at {percentile}th Percentile")
+    ax.plot(output.percentile_path(50), color='black', label="Median", linewidth=2)
+    if input.withdraw_amount > 0:
+        ax.axvline(input.withdraw_month, linestyle='dashed', color='red', label="Withdrawal")
+    ax.set_xticks(ticks)
+    ax.set_xticklabels([str(i // 12) for i in ticks])
+    ax.set_xlabel("Years")
+    ax.set_ylabel("Total Portfolio Value ($)")
+    ax.legend(loc="upper left")
+    st.pyplot(fig)
+    plt.close(fig)
+
+    st.markdown("### 📈 Final Portfolio Value Statistics")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("10th Percentile", f"${np.percentile(output.final_values, 10):,.0f}")
+    col2.metric("Median", f"${np.percentile(output.final_values, 50):,.0f}")
+    col3.metric("90th Percentile", f"${np.percentile(output.final_values, 90):,.0f}")
+
+    st.markdown("### 🥧 Average Allocation Over Time")
+    fig, ax = plt.subplots(figsize=(12, 4))
+    ax.stackplot(months, output.mean_balances, labels=input.names, alpha=0.8)
+    ax.set_xticks(ticks)
+    ax.set_xticklabels([str(i // 12) for i in ticks])
+    ax.set_xlabel("Years")
+    ax.set_ylabel("Mean Balance ($)")
+    ax.legend(loc="upper left")
+    st.pyplot(fig)
+    plt.close(fig)
+
+    final_mean = output.mean_balances[:, -1]
+    st.dataframe(
+        {
+            "Asset": list(input.names),
+            "Mean Final Balance ($)": [f"{value:,.0f}" for value in final_mean],
+            "Share (%)": [f"{share:.1%}" for share in final_mean / max(final_mean.sum(), 1e-12)],
+        },
+        hide_index=True,
+    )
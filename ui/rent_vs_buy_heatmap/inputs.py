@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from mortgage_input import MortgageInput
+
+import numpy as np
+import streamlit as st
+
+
+# field: (label, default min, default max, entered as a percentage)
+HEATMAP_AXES = {
+    "mortgage_interest_rate": ("Mortgage Rate (%)", 3.0, 9.0, True),
+    "property_appreciation": ("Home Appreciation (%)", -2.0, 6.0, True),
+    "stock_interest_rate": ("Stock Return (%)", 0.0, 12.0, True),
+    "rental_increase_pct": ("Yearly Rent Increase (%)", 0.0, 6.0, True),
+    "yearly_increase": ("Savings Growth (%)", 0.0, 6.0, True),
+    "home_price": ("Home Price ($)", 900_000.0, 2_000_000.0, False),
+    "monthly_rent": ("Monthly Rent ($)", 3_000.0, 10_000.0, False),
+}
+
+
+@dataclass
+class HeatmapAxis:
+    field: str
+    label: str
+    # values as entered in the UI, percentages are not divided by 100
+    display_values: np.ndarray
+    is_percent: bool
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.display_values / 100 if self.is_percent else self.display_values
+
+
+@dataclass
+class HeatmapInput:
+    loan_label: str
+    input: MortgageInput
+    x: HeatmapAxis
+    y: HeatmapAxis
+
+
+def _axis_inputs(name: str, default_field: str, resolution: int, exclude: str = "") -> HeatmapAxis:
+    fields = [f for f in HEATMAP_AXES if f != exclude]
+    field = st.selectbox(
+        f"{name} axis",
+        fields,
+        index=fields.index(default_field) if default_field in fields else 0,
+        format_func=lambda f: HEATMAP_AXES[f][0],
+        key=f"heatmap_{name}_field",
+    )
+    label, low, high, is_percent = HEATMAP_AXES[field]
+    col1, col2 = st.columns(2)
+    with col1:
+        low = st.number_input(f"{label} from", value=low, key=f"heatmap_{name}_{field}_low")
+    with col2:
+        high = st.number_input(f"{label} to", value=high, key=f"heatmap_{name}_{field}_high")
+    return HeatmapAxis(field, label, np.linspace(low, high, resolution), is_percent)
+
+
+def display_inputs(inputs: dict[str, MortgageInput]) -> HeatmapInput:
+    loan_label = st.selectbox("Loan Type", list(inputs))
+    resolution = st.slider("Grid Points per Axis", 10, 200, 200, step=10)
+
+    x = _axis_inputs("X", "mortgage_interest_rate", resolution)
+    y = _axis_inputs("Y", "property_appreciation", resolution, exclude=x.field)
+
+    return HeatmapInput(loan_label=loan_label, input=inputs[loan_label], x=x, y=y)
@@ -0,0 +1,48 @@
+from mortgage_batch import MortgageBatchOutput
+from ui.rent_vs_buy_heatmap.inputs import HeatmapInput
+
+import plotly.graph_objects as go
+import streamlit as st
+
+
+def display_output(input: HeatmapInput, output: MortgageBatchOutput) -> None:
+    # scenarios were generated with the y axis varying slowest
+    gap = output.final_net_worth_gap.reshape(len(input.y.values), len(input.x.values))
+
+    st.markdown(f"### 🗺️ {input.loan_label}: Final Net Worth, Buy minus Rent")
+
+    fig = go.Figure(go.Heatmap(
+        x=input.x.display_values,
+        y=input.y.display_values,
+        z=gap,
+        colorscale="RdBu",
+        zmid=0,
+        colorbar=dict(title=dict(text="Buy - Rent ($)")),
+        hovertemplate=(
+            f"{input.x.label}: %{{x:,.2f}}<br>"
+            f"{input.y.label}: %{{y:,.2f}}<br>"
+            "Buy - Rent: $%{z:,.0f}<extra></extra>"
+        ),
+    ))
+    fig.add_trace(go.Contour(
+        x=input.x.display_values,
+        y=input.y.display_values,
+        z=gap,
+        contours=dict(start=0, end=0, size=1, coloring="none"),
+        line=dict(color="black", width=2),
+        showscale=False,
+        hoverinfo="skip",
+    ))
+    fig.update_layout(
+        xaxis=dict(title=dict(text=input.x.label)),
+        yaxis=dict(title=dict(text=input.y.label)),
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        height=650,
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.write(
+        f"Buying comes out ahead in **{(gap > 0).mean():.0%}** of the "
+        f"{gap.size:,} scenarios (black line marks break-even) on "
+        f"{output.ds[-1]:%m/%Y}.")
@@ -0,0 +1,24 @@
+from mortgage_input import MortgageInput
+from rent_vs_buy_monte_carlo import MarketUncertainty
+from typing import Tuple
+
+import streamlit as st
+
+
+def display_inputs(inputs: dict[str, MortgageInput]) -> Tuple[str, MortgageInput, MarketUncertainty]:
+    loan_label = st.selectbox("Loan Type", list(inputs))
+    n_paths = st.slider("Number of Simulations", 1_000, 50_000, 10_000, step=1_000)
+
+    st.markdown("### 🎲 Yearly Volatility")
+    appreciation_vol = st.slider("Home Appreciation Volatility (%)", 0.0, 20.0, 5.0) / 100
+    stock_vol = st.slider("Stock Return Volatility (%)", 0.0, 50.0, 15.0) / 100
+    rent_growth_vol = st.slider("Rent Increase Volatility (%)", 0.0, 10.0, 2.0) / 100
+    home_stock_correlation = st.slider("Home / Stock Correlation", -1.0, 1.0, 0.0, step=0.05)
+
+    return loan_label, inputs[loan_label], MarketUncertainty(
+        n_paths=n_paths,
+        appreciation_vol=appreciation_vol,
+        stock_vol=stock_vol,
+        rent_growth_vol=rent_growth_vol,
+        home_stock_correlation=home_stock_correlation,
+    )
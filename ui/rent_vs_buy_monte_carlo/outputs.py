@@ -0,0 +1,56 @@
+from rent_vs_buy_monte_carlo import RentVsBuyMonteCarloOutput
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+
+def _gap_fan_chart(output: RentVsBuyMonteCarloOutput) -> go.Figure:
+    p10, p50, p90 = (output.gap_percentile_path(p) for p in (10, 50, 90))
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=output.ds, y=p90, line=dict(width=0), showlegend=False,
+                             hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=output.ds, y=p10, fill="tonexty", line=dict(width=0),
+                             fillcolor="rgba(70,130,180,0.3)", name="10th - 90th Percentile",
+                             hovertemplate="P10: $%{y:,.0f}<extra></extra>"))
+    fig.add_trace(go.Scatter(x=output.ds, y=p50, line=dict(color="steelblue", width=2),
+                             name="Median", hovertemplate="Median: $%{y:,.0f}<extra></extra>"))
+    fig.add_hline(y=0, line_color="black", line_width=1)
+    fig.update_layout(
+        yaxis=dict(title=dict(text="Net Worth, Buy - Rent ($)")),
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        legend=dict(x=0, y=1.1, orientation="h"),
+    )
+    return fig
+
+
+def display_output(label: str, output: RentVsBuyMonteCarloOutput) -> None:
+    st.markdown(f"### 🎲 {label}: Net Worth, Buy minus Rent")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Chance Buying Ends Ahead", f"{output.probability_buy_ahead:.0%}")
+    col2.metric("Median Final Gap", f"${np.median(output.final_gap):,.0f}")
+    crossed = output.crossover_month[output.crossover_month >= 0]
+    col3.metric(
+        "Median Break-even",
+        f"{np.median(crossed) / 12:.1f} years" if len(crossed) else "Never",
+    )
+
+    st.plotly_chart(_gap_fan_chart(output), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### Final Gap")
+        fig = go.Figure(go.Histogram(x=output.final_gap, nbinsx=60, marker_color="steelblue"))
+        fig.add_vline(x=0, line_color="black", line_width=1)
+        fig.update_layout(xaxis=dict(title=dict(text="Buy - Rent ($)")), plot_bgcolor="white",
+                          paper_bgcolor="white")
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        st.markdown("#### First Year Buying Is Ahead")
+        fig = go.Figure(go.Histogram(x=crossed / 12, xbins=dict(size=1), marker_color="seagreen"))
+        fig.update_layout(xaxis=dict(title=dict(text="Year")), plot_bgcolor="white",
+                          paper_bgcolor="white")
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"{1 - len(crossed) / len(output.crossover_month):.0%} of simulations "
+                   "never have buying ahead.")
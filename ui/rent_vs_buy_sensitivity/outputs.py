@@ -0,0 +1,92 @@
+from mortgage_sensitivity import FieldSensitivity, SensitivityOutput
+
+import plotly.graph_objects as go
+import streamlit as st
+
+
+# field: (label, shown as a percentage)
+FIELD_LABELS = {
+    "home_price": ("Home Price", False),
+    "downpayment": ("Downpayment", False),
+    "mortgage_interest_rate": ("Mortgage Rate", True),
+    "loan_term": ("Loan Term (years)", False),
+    "property_appreciation": ("Home Appreciation", True),
+    "starting_cash": ("Savings", False),
+    "realtor_fee_at_sale": ("Realtor Fee", True),
+    "capital_gains_tax": ("Capital Gains Tax", True),
+    "monthly_rent": ("Monthly Rent", False),
+    "rental_increase_pct": ("Yearly Rent Increase", True),
+    "stock_interest_rate": ("Stock Return", True),
+    "monthly_income": ("Monthly Income", False),
+    "yearly_increase": ("Savings Growth", True),
+    "closing_cost_percentage": ("Closing Cost", True),
+    "property_tax_rate": ("Property Tax", True),
+    "monthly_pmi": ("Monthly PMI", False),
+    "monthly_hoa": ("Monthly HOA", False),
+    "monthly_insurance": ("Monthly Insurance", False),
+    "monthly_maintenance_fund": ("Monthly Maintenance Fund", False),
+    "arm_rates.fixed_period": ("ARM Fixed Period (years)", False),
+    "arm_rates.initial_arm_cap": ("Initial ARM Cap", True),
+    "arm_rates.annual_arm_cap": ("Annual ARM Cap", True),
+    "arm_rates.lifetime_arm_cap": ("Lifetime ARM Cap", True),
+}
+
+
+# x is the change from the base case, customdata the resulting gap
+HOVER_TEMPLATE = "Buy - Rent: %{customdata:$,.0f}<br>Change vs base: %{x:+$,.0f}"
+
+
+def _format_value(field: str, value: float) -> str:
+    _, is_percent = FIELD_LABELS.get(field, (field, False))
+    if is_percent:
+        return f"{value * 100:.2f}%"
+    if field == "loan_term" or field == "arm_rates.fixed_period":
+        return f"{value:.0f}"
+    return f"${value:,.0f}"
+
+
+def _label(result: FieldSensitivity) -> str:
+    label, _ = FIELD_LABELS.get(result.field, (result.field, False))
+    return (f"{label} ({_format_value(result.field, result.low_value)} → "
+            f"{_format_value(result.field, result.high_value)})")
+
+
+def display_output(label: str, output: SensitivityOutput) -> None:
+    st.markdown(f"### 🌪️ {label}: What Moves Final Net Worth (Buy minus Rent)")
+    st.metric("Base Case (Buy - Rent)", f"${output.base_gap:,.0f}")
+
+    # largest swing on top
+    results = output.fields[::-1]
+    labels = [_label(r) for r in results]
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=labels,
+        x=[r.low_gap - output.base_gap for r in results],
+        base=output.base_gap,
+        customdata=[r.low_gap for r in results],
+        orientation="h",
+        name="Input Lowered",
+        marker_color="indianred",
+        hovertemplate=HOVER_TEMPLATE + "<extra>Lowered</extra>",
+    ))
+    fig.add_trace(go.Bar(
+        y=labels,
+        x=[r.high_gap - output.base_gap for r in results],
+        base=output.base_gap,
+        customdata=[r.high_gap for r in results],
+        orientation="h",
+        name="Input Raised",
+        marker_color="steelblue",
+        hovertemplate=HOVER_TEMPLATE + "<extra>Raised</extra>",
+    ))
+    fig.add_vline(x=output.base_gap, line_color="black", line_width=1)
+    fig.update_layout(
+        barmode="overlay",
+        xaxis=dict(title=dict(text="Final Net Worth, Buy - Rent ($)")),
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        height=max(400, 32 * len(results)),
+        legend=dict(x=0, y=1.05, orientation="h"),
+    )
+    st.plotly_chart(fig, use_container_width=True)